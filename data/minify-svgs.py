@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+#
+# Strips the device SVGs down to what Piper renders before they are compiled
+# into the GResource, and writes the index that piper.svg.ParsedSvg would
+# otherwise build by parsing the SVG with lxml at runtime.
+#
+# Usage: minify-svgs.py OUTDIR SVG [SVG...]
+#
+# For every data/svgs/NAME.svg this writes OUTDIR/NAME.min.svg and
+# OUTDIR/NAME.json.
+
+import json
+import re
+import sys
+from pathlib import Path
+
+from lxml import etree
+
+SVG_NS = "http://www.w3.org/2000/svg"
+XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+EDITOR_NAMESPACES = {
+    "http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd",
+    "http://www.inkscape.org/namespaces/inkscape",
+    "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
+    "http://creativecommons.org/ns#",
+    "http://purl.org/dc/elements/1.1/",
+}
+
+# The layers Piper renders, see tests/check-svg.py.
+LAYERS = {"Device", "Buttons", "LEDs"}
+# The elements MouseMap lays out and highlights, keep in sync with
+# piper.svg.ParsedSvg._MAPPED_ELEMENT.
+MAPPED_ELEMENT = re.compile(r"(button|led)\d+(-leader|-path)?")
+# Elements whose whitespace is content.
+TEXT_ELEMENTS = {"text", "tspan", "textPath", "flowRoot", "flowPara", "flowSpan"}
+
+URL_REFERENCE = re.compile(r"url\(\s*['\"]?#([^'\")\s]+)")
+
+
+def namespace(node):
+    return etree.QName(node).namespace
+
+
+def localname(node):
+    return etree.QName(node).localname
+
+
+def references(element):
+    """
+    Returns the ids that the element refers to through url(#id) or href.
+    """
+    ids = set()
+    for name, value in element.attrib.items():
+        if name in (XLINK_HREF, "href") and value.startswith("#"):
+            ids.add(value[1:])
+        else:
+            ids.update(URL_REFERENCE.findall(value))
+    return ids
+
+
+def is_mapped(element):
+    element_id = element.get("id")
+    return element_id is not None and MAPPED_ELEMENT.fullmatch(element_id)
+
+
+def strip_editor_data(root):
+    for node in list(root.iter()):
+        if not isinstance(node.tag, str):
+            # Comments and processing instructions.
+            node.getparent().remove(node)
+            continue
+        if namespace(node) in EDITOR_NAMESPACES or localname(node) == "metadata":
+            node.getparent().remove(node)
+            continue
+        for name in list(node.attrib):
+            if namespace(name) in EDITOR_NAMESPACES:
+                del node.attrib[name]
+        style = node.get("style")
+        if style is not None:
+            declarations = [
+                d
+                for d in style.split(";")
+                if d.strip() and not d.strip().startswith("-inkscape")
+            ]
+            node.set("style", ";".join(declarations))
+
+
+def strip_unused(root):
+    """
+    Drops unreferenced definitions and the top-level elements that neither
+    are one of the layers nor contain mapped elements.
+    """
+    referenced = set()
+    keep = [
+        child
+        for child in root
+        if child.get("id") in LAYERS
+        or localname(child) in ("style", "title")
+        or any(is_mapped(e) for e in child.iter())
+    ]
+    pending = list(keep)
+    by_id = {e.get("id"): e for e in root.iter() if e.get("id") is not None}
+    while pending:
+        element = pending.pop()
+        for e in element.iter():
+            for ref in references(e) - referenced:
+                referenced.add(ref)
+                if ref in by_id:
+                    pending.append(by_id[ref])
+
+    for child in list(root):
+        if child in keep:
+            continue
+        if localname(child) == "defs":
+            for definition in list(child):
+                if definition.get("id") not in referenced:
+                    child.remove(definition)
+            if len(child):
+                continue
+        elif any(e.get("id") in referenced for e in child.iter()):
+            continue
+        root.remove(child)
+    return referenced
+
+
+def strip_ids(root, referenced):
+    # A stylesheet may select elements by id, keep them all then.
+    if root.find(f"{{{SVG_NS}}}style") is not None:
+        return
+    for element in root.iter():
+        element_id = element.get("id")
+        if element_id is None:
+            continue
+        if element_id in LAYERS or element_id in referenced or is_mapped(element):
+            continue
+        del element.attrib["id"]
+
+
+def strip_whitespace(root):
+    for element in root.iter():
+        if localname(element) in TEXT_ELEMENTS:
+            continue
+        if element.text is not None and not element.text.strip():
+            element.text = None
+        parent = element.getparent()
+        if (
+            element.tail is not None
+            and not element.tail.strip()
+            and (parent is None or localname(parent) not in TEXT_ELEMENTS)
+        ):
+            element.tail = None
+
+
+def build_index(root):
+    """
+    Returns the ids of the mapped elements and of the leaders that point to
+    the left, like piper.svg.ParsedSvg._build_index().
+    """
+    elements = []
+    leaders = {}
+    for element in root.iter():
+        if not is_mapped(element):
+            continue
+        element_id = element.get("id")
+        elements.append(f"#{element_id}")
+        if element_id.endswith("-leader") and element.tag == f"{{{SVG_NS}}}rect":
+            style = element.get("style", "")
+            leaders.setdefault(f"#{element_id}", []).append("text-align:end" in style)
+    left = [svg_id for svg_id, sides in leaders.items() if sides.count(True) == 1]
+    return {"elements": sorted(set(elements)), "left": sorted(left)}
+
+
+def minify(path, outdir):
+    root = etree.parse(str(path)).getroot()
+
+    # Index first, so it matches what the original SVG would have given.
+    index = build_index(root)
+
+    strip_editor_data(root)
+    referenced = strip_unused(root)
+    strip_ids(root, referenced)
+    strip_whitespace(root)
+    etree.cleanup_namespaces(root)
+
+    svg = outdir / f"{path.stem}.min.svg"
+    # Serializes the root alone, dropping the comments around it.
+    svg.write_bytes(etree.tostring(root, xml_declaration=True, encoding="UTF-8"))
+    with open(outdir / f"{path.stem}.json", "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    return svg.stat().st_size
+
+
+if __name__ == "__main__":
+    outdir = Path(sys.argv[1])
+    before = 0
+    after = 0
+    for path in map(Path, sys.argv[2:]):
+        before += path.stat().st_size
+        after += minify(path, outdir)
+    saved = before - after
+    print(
+        f"Minified {len(sys.argv) - 2} SVGs from {before} to {after} bytes, "
+        f"saved {saved} bytes ({saved * 100 / max(before, 1):.0f}%)"
+    )
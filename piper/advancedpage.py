@@ -6,7 +6,7 @@ import gi
 
 from .mousemap import MouseMap
 from .ratbagd import RatbagdDevice, RatbagdProfile
-from .util.gobject import connect_signal_with_weak_ref
+from .util.gobject import WeakSignalGroup
 
 gi.require_version("Gtk", "3.0")
 from gi.repository import GObject, Gtk  # noqa: E402
@@ -34,38 +34,16 @@ class AdvancedPage(Gtk.Box):
         """Instantiates a new AdvancedPage."""
         Gtk.Box.__init__(self, *args, **kwargs)
 
-        self._profile = profile
+        self._profile_signals = WeakSignalGroup(self)
 
         cell = Gtk.CellRendererText()
         self.debounce.pack_start(cell, True)
         self.debounce.add_attribute(cell, "text", 0)
 
-        model = Gtk.ListStore(str)
-        for ms in profile.debounces:
-            model.append([str(ms)])
-        self.debounce.set_model(model)
-
         self._handler_debounce = self.debounce.connect(
             "changed", self._on_debounce_combo_changed
         )
 
-        self._profile_debounce_time_changed_handler = connect_signal_with_weak_ref(
-            self,
-            self._profile,
-            "notify::debounce",
-            self._on_profile_debounce_time_changed,
-        )
-        self._update_widget_debounce_time()
-
-        are_report_rates_supported = (
-            profile.report_rate != 0 and len(profile.report_rates) != 0
-        )
-        self.rate_button_box.set_sensitive(are_report_rates_supported)
-        self.rate_125.set_sensitive(125 in profile.report_rates)
-        self.rate_250.set_sensitive(250 in profile.report_rates)
-        self.rate_500.set_sensitive(500 in profile.report_rates)
-        self.rate_1000.set_sensitive(1000 in profile.report_rates)
-
         self._handler_125 = self.rate_125.connect(
             "toggled", self._on_report_rate_toggled, 125
         )
@@ -79,16 +57,6 @@ class AdvancedPage(Gtk.Box):
             "toggled", self._on_report_rate_toggled, 1000
         )
 
-        self._profile_report_rate_changed_handler = connect_signal_with_weak_ref(
-            self,
-            self._profile,
-            "notify::report-rate",
-            self._on_profile_report_rate_changed,
-        )
-        self._update_widget_report_rate()
-
-        profile = self._profile
-
         self._mousemap = MouseMap("#Buttons", device, spacing=20, border_width=20)
         self.pack_start(self._mousemap, True, True, 0)
 
@@ -96,18 +64,55 @@ class AdvancedPage(Gtk.Box):
             "state-set", self._on_angle_snapping_switch_state_set
         )
 
+        self.set_profile(profile)
+        self.show_all()
+
+    def set_profile(self, profile: RatbagdProfile) -> None:
+        """Binds this page to the given profile.
+
+        @param profile The profile to configure, as ratbagd.RatbagdProfile
+        """
+        self._profile_signals.disconnect_all()
+        self._profile = profile
+
+        model = Gtk.ListStore(str)
+        for ms in profile.debounces:
+            model.append([str(ms)])
+        with self.debounce.handler_block(self._handler_debounce):
+            self.debounce.set_model(model)
+
+        self._profile_debounce_time_changed_handler = self._profile_signals.connect(
+            profile,
+            "notify::debounce",
+            self._on_profile_debounce_time_changed,
+        )
+        self._update_widget_debounce_time()
+
+        are_report_rates_supported = (
+            profile.report_rate != 0 and len(profile.report_rates) != 0
+        )
+        self.rate_button_box.set_sensitive(are_report_rates_supported)
+        self.rate_125.set_sensitive(125 in profile.report_rates)
+        self.rate_250.set_sensitive(250 in profile.report_rates)
+        self.rate_500.set_sensitive(500 in profile.report_rates)
+        self.rate_1000.set_sensitive(1000 in profile.report_rates)
+
+        self._profile_report_rate_changed_handler = self._profile_signals.connect(
+            profile,
+            "notify::report-rate",
+            self._on_profile_report_rate_changed,
+        )
+        self._update_widget_report_rate()
+
         self.angle_snapping.set_sensitive(profile.angle_snapping != -1)
 
-        self._profile_angle_snapping_changed_handler = connect_signal_with_weak_ref(
-            self,
-            self._profile,
+        self._profile_angle_snapping_changed_handler = self._profile_signals.connect(
+            profile,
             "notify::angle-snapping",
             self._on_profile_angle_snapping_changed,
         )
         self._update_widget_angle_snapping()
 
-        self.show_all()
-
     def _on_profile_debounce_time_changed(
         self, profile: RatbagdProfile, pspec: Optional[GObject.ParamSpec]
     ) -> None:
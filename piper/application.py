@@ -2,7 +2,10 @@
 
 from typing import Optional
 
-from .ratbagd import Ratbagd
+import signal
+
+from .ratbagd import Ratbagd, dump_dbus_call_stats
+from .util import trace
 from .window import Window
 
 import gi
@@ -32,9 +35,14 @@ class Application(Gtk.Application):
         """This function is called when the application is first started. All
         initialization should be done here, to prevent doing duplicate work in
         case another window is opened."""
-        Gtk.Application.do_startup(self)
-        self._build_app_menu()
-        self._ratbagd: Optional[Ratbagd] = None
+        with trace.span("Application.do_startup"):
+            Gtk.Application.do_startup(self)
+            self._build_app_menu()
+            self._ratbagd: Optional[Ratbagd] = None
+            # `kill -USR1` prints how long the calls to ratbagd took.
+            GLib.unix_signal_add(
+                GLib.PRIORITY_DEFAULT, signal.SIGUSR1, self._on_sigusr1
+            )
 
     def init_ratbagd(self) -> Ratbagd:
         if self._ratbagd is None:
@@ -44,8 +52,13 @@ class Application(Gtk.Application):
     def do_activate(self) -> None:
         """This function is called when the user requests a new window to be
         opened."""
-        window = Window(self.init_ratbagd, application=self)
-        window.present()
+        with trace.span("Application.do_activate"):
+            window = Window(self.init_ratbagd, application=self)
+            window.present()
+
+    def _on_sigusr1(self) -> bool:
+        dump_dbus_call_stats()
+        return GLib.SOURCE_CONTINUE
 
     def _build_app_menu(self) -> None:
         # Set up the app menu
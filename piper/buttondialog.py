@@ -105,7 +105,8 @@ class ButtonDialog(Gtk.Dialog):
         elif self._action_type == RatbagdButton.ActionType.BUTTON:
             self._mapping = self._button.mapping
         elif self._action_type == RatbagdButton.ActionType.MACRO:
-            self._mapping = self._button.macro
+            # The button's macro is shared, edit a copy of it.
+            self._mapping = RatbagdMacro.from_ratbag(self._button.macro.keys)
         elif self._action_type == RatbagdButton.ActionType.KEY:
             self._mapping = self._button.key
         elif self._action_type == RatbagdButton.ActionType.SPECIAL:
@@ -1,9 +1,8 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
 from gettext import gettext as _
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 
-from .buttondialog import ButtonDialog
 from .mousemap import MouseMap
 from .optionbutton import OptionButton
 from .ratbagd import (
@@ -12,7 +11,10 @@ from .ratbagd import (
     RatbagdProfile,
     evcode_to_str,
 )
-from .util.gobject import connect_signal_with_weak_ref
+from .util.gobject import WeakSignalGroup
+
+if TYPE_CHECKING:
+    from .buttondialog import ButtonDialog
 
 import gi
 
@@ -36,56 +38,50 @@ class ButtonsPage(Gtk.Box):
         Gtk.Box.__init__(self, *args, **kwargs)
 
         self._device = ratbagd_device
-        self._profile = profile
+        self._button_signals = WeakSignalGroup(self)
+        self._option_buttons: List[OptionButton] = []
+        self._button_indices: List[int] = []
 
         self._mousemap = MouseMap("#Buttons", self._device, spacing=20, border_width=20)
         self.pack_start(self._mousemap, True, True, 0)
         self._sizegroup = Gtk.SizeGroup(mode=Gtk.SizeGroupMode.HORIZONTAL)
 
-        for ratbagd_button in profile.buttons:
-            button = OptionButton()
+        self.set_profile(profile)
+        self.show_all()
+
+    def set_profile(self, profile: RatbagdProfile) -> None:
+        """Binds this page to the given profile, reusing the option buttons if
+        it has the same buttons as the previous one.
+
+        @param profile The profile to configure, as ratbagd.RatbagdProfile
+        """
+        self._button_signals.disconnect_all()
+        self._profile = profile
+
+        indices = [ratbagd_button.index for ratbagd_button in profile.buttons]
+        if indices != self._button_indices:
+            for button in self._option_buttons:
+                button.destroy()
+            self._option_buttons = []
+            for position, index in enumerate(indices):
+                button = OptionButton()
+                button.connect("clicked", self._on_button_clicked, position)
+                self._mousemap.add(button, f"#button{index}")
+                self._sizegroup.add_widget(button)
+                self._option_buttons.append(button)
+            self._button_indices = indices
+            self._mousemap.show_all()
+
+        for ratbagd_button, button in zip(profile.buttons, self._option_buttons):
             # Set the correct label in the option button.
             self._on_button_mapping_changed(ratbagd_button, None, button)
-            button.connect("clicked", self._on_button_clicked, ratbagd_button)
-            connect_signal_with_weak_ref(
-                self,
-                ratbagd_button,
-                "notify::mapping",
-                self._on_button_mapping_changed,
-                button,
-            )
-            connect_signal_with_weak_ref(
-                self,
-                ratbagd_button,
-                "notify::special",
-                self._on_button_mapping_changed,
-                button,
-            )
-            connect_signal_with_weak_ref(
-                self,
-                ratbagd_button,
-                "notify::macro",
-                self._on_button_mapping_changed,
-                button,
-            )
-            connect_signal_with_weak_ref(
-                self,
-                ratbagd_button,
-                "notify::key",
-                self._on_button_mapping_changed,
-                button,
-            )
-            connect_signal_with_weak_ref(
-                self,
-                ratbagd_button,
-                "notify::action-type",
-                self._on_button_mapping_changed,
-                button,
-            )
-            self._mousemap.add(button, f"#button{ratbagd_button.index}")
-            self._sizegroup.add_widget(button)
-
-        self.show_all()
+            for prop in ("mapping", "special", "macro", "key", "action-type"):
+                self._button_signals.connect(
+                    ratbagd_button,
+                    f"notify::{prop}",
+                    self._on_button_mapping_changed,
+                    button,
+                )
 
     def _on_button_mapping_changed(
         self,
@@ -117,12 +113,14 @@ class ButtonsPage(Gtk.Box):
             label = _("Unknown")
         optionbutton.set_label(label)
 
-    def _on_button_clicked(
-        self, button: OptionButton, ratbagd_button: RatbagdButton
-    ) -> None:
+    def _on_button_clicked(self, button: OptionButton, position: int) -> None:
         # Presents the ButtonDialog to configure the mouse button corresponding
         # to the clicked button.
+        # The dialog is only imported once needed, it's a lot of code.
+        from .buttondialog import ButtonDialog
+
         buttons = self._profile.buttons
+        ratbagd_button = buttons[position]
         device_type = self._device.device_type
         dialog = ButtonDialog(
             ratbagd_button,
@@ -137,46 +135,49 @@ class ButtonsPage(Gtk.Box):
 
     def _on_dialog_response(
         self,
-        dialog: ButtonDialog,
+        dialog: "ButtonDialog",
         response: Gtk.ResponseType,
         ratbagd_button: RatbagdButton,
     ) -> None:
         # The user either pressed cancel or apply. If it's apply, apply the
         # changes before closing the dialog, otherwise just close the dialog.
         if response == Gtk.ResponseType.APPLY:
-            if dialog.action_type == RatbagdButton.ActionType.NONE:
-                ratbagd_button.disable()
-            elif dialog.action_type == RatbagdButton.ActionType.BUTTON:
-                if dialog.mapping in [
-                    ButtonDialog.LEFT_HANDED_MODE,
-                    ButtonDialog.RIGHT_HANDED_MODE,
-                ]:
-                    left = self._find_button_type(0)
-                    right = self._find_button_type(1)
-                    if left is None or right is None:
-                        return
-                    # Mappings are 1-indexed, so 1 is left mouse click and 2 is
-                    # right mouse click.
-                    if dialog.mapping == ButtonDialog.LEFT_HANDED_MODE:
-                        left.mapping, right.mapping = 2, 1
-                    elif dialog.mapping == ButtonDialog.RIGHT_HANDED_MODE:
-                        left.mapping, right.mapping = 1, 2
-                else:
-                    ratbagd_button.mapping = dialog.mapping
-            elif dialog.action_type == RatbagdButton.ActionType.MACRO:
-                ratbagd_button.macro = dialog.mapping
-            elif dialog.action_type == RatbagdButton.ActionType.KEY:
-                ratbagd_button.key = dialog.mapping
-            elif dialog.action_type == RatbagdButton.ActionType.SPECIAL:
-                ratbagd_button.special = dialog.mapping
-                lower = RatbagdButton.ActionSpecial.PROFILE_CYCLE_UP
-                upper = RatbagdButton.ActionSpecial.PROFILE_DOWN
-                if lower <= dialog.mapping <= upper:
-                    index = ratbagd_button.index
-                    for profile in self._device.profiles:
-                        if profile is self._profile:
-                            continue
-                        profile.buttons[index].special = dialog.mapping
+            # Group all writes, e.g. to both buttons when swapping handedness
+            # or to every profile for the profile cycling specials.
+            with self._device.transaction():
+                if dialog.action_type == RatbagdButton.ActionType.NONE:
+                    ratbagd_button.disable()
+                elif dialog.action_type == RatbagdButton.ActionType.BUTTON:
+                    if dialog.mapping in [
+                        dialog.LEFT_HANDED_MODE,
+                        dialog.RIGHT_HANDED_MODE,
+                    ]:
+                        left = self._find_button_type(0)
+                        right = self._find_button_type(1)
+                        if left is None or right is None:
+                            return
+                        # Mappings are 1-indexed, so 1 is left mouse click and
+                        # 2 is right mouse click.
+                        if dialog.mapping == dialog.LEFT_HANDED_MODE:
+                            left.mapping, right.mapping = 2, 1
+                        elif dialog.mapping == dialog.RIGHT_HANDED_MODE:
+                            left.mapping, right.mapping = 1, 2
+                    else:
+                        ratbagd_button.mapping = dialog.mapping
+                elif dialog.action_type == RatbagdButton.ActionType.MACRO:
+                    ratbagd_button.macro = dialog.mapping
+                elif dialog.action_type == RatbagdButton.ActionType.KEY:
+                    ratbagd_button.key = dialog.mapping
+                elif dialog.action_type == RatbagdButton.ActionType.SPECIAL:
+                    ratbagd_button.special = dialog.mapping
+                    lower = RatbagdButton.ActionSpecial.PROFILE_CYCLE_UP
+                    upper = RatbagdButton.ActionSpecial.PROFILE_DOWN
+                    if lower <= dialog.mapping <= upper:
+                        index = ratbagd_button.index
+                        for profile in self._device.profiles:
+                            if profile is self._profile:
+                                continue
+                            profile.buttons[index].special = dialog.mapping
         dialog.destroy()
 
     def _find_button_type(self, button_type: int) -> Optional[RatbagdButton]:
@@ -1,6 +1,7 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
-from piper.svg import get_svg
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
 
 import sys
 
@@ -9,7 +10,13 @@ import gi
 from .ratbagd import RatbagdDevice
 
 gi.require_version("Gtk", "3.0")
-from gi.repository import GdkPixbuf, GObject, Gtk, Rsvg  # noqa
+from gi.repository import GLib, GObject, Gtk  # noqa
+
+# Loads or renders the thumbnails off the main thread, so a long device list
+# doesn't stall the welcome perspective.
+_thumbnail_executor = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix="piper-thumbnail"
+)
 
 
 @Gtk.Template(resource_path="/org/freedesktop/Piper/ui/DeviceRow.ui")
@@ -25,6 +32,7 @@ class DeviceRow(Gtk.ListBoxRow):
     def __init__(self, device: RatbagdDevice, *args, **kwargs) -> None:
         Gtk.ListBoxRow.__init__(self, *args, **kwargs)
         self._device = device
+        self._thumbnail: Optional[Future] = None
 
         fw_version = device.firmware_version
         if fw_version:
@@ -34,31 +42,58 @@ class DeviceRow(Gtk.ListBoxRow):
         else:
             self.title.set_text(device.name)
 
-        try:
-            svg_bytes = get_svg(device.model)
-            assert svg_bytes is not None
-            handle = Rsvg.Handle.new_from_data(svg_bytes)
-            assert handle is not None
-            svg = handle.get_pixbuf_sub("#Device")
-            handle.close()
-            if svg is None:
-                print(
-                    f"Device {device.name}'s SVG is incompatible",
-                    file=sys.stderr,
-                )
-            else:
-                svg = svg.scale_simple(50, 50, GdkPixbuf.InterpType.BILINEAR)
-                if svg is None:
-                    print("Cannot resize device SVG", file=sys.stderr)
-                else:
-                    self.image.set_from_pixbuf(svg)
-        except FileNotFoundError:
+        # piper.thumbnails pulls in cairo, Rsvg and the SVG lookup, so it is
+        # only imported once there are devices to list.
+        from .thumbnails import THUMBNAIL_SIZE
+
+        # The template's icon stands in until the thumbnail is rendered.
+        self.image.set_pixel_size(THUMBNAIL_SIZE)
+        self._render_thumbnail()
+        self.connect("notify::scale-factor", lambda row, pspec: row._render_thumbnail())
+        self.connect("destroy", self._on_destroy)
+
+        self.show_all()
+
+    def _render_thumbnail(self) -> None:
+        from .thumbnails import get_thumbnail
+
+        if self._thumbnail is not None:
+            self._thumbnail.cancel()
+        future = _thumbnail_executor.submit(
+            get_thumbnail, self._device.model, self.get_scale_factor()
+        )
+        self._thumbnail = future
+        # Done callbacks run in the worker thread, widgets may only be touched
+        # from the main loop.
+        future.add_done_callback(
+            lambda f: GLib.idle_add(self._on_thumbnail_rendered, f)
+        )
+
+    def _on_thumbnail_rendered(self, future: Future) -> bool:
+        # Ignore superseded renders and rows destroyed in the meantime.
+        if future is not self._thumbnail or future.cancelled():
+            return False
+        self._thumbnail = None
+
+        error = future.exception()
+        if error is not None:
             print(
-                f"Device {device.name} has no image or its path is invalid",
+                f"Device {self._device.name} has no image or its path is invalid: {error}",
                 file=sys.stderr,
             )
+            return False
 
-        self.show_all()
+        surface = future.result()
+        if surface is None:
+            print(f"Device {self._device.name}'s SVG is incompatible", file=sys.stderr)
+        else:
+            self.image.set_from_surface(surface)
+        return False
+
+    def _on_destroy(self, row: Gtk.Widget) -> None:
+        if self._thumbnail is not None:
+            self._thumbnail.cancel()
+            self._thumbnail = None
 
     @GObject.Property
     def device(self) -> RatbagdDevice:
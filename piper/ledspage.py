@@ -1,13 +1,15 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
 from gettext import gettext as _
-from typing import Optional
+from typing import TYPE_CHECKING, List, Optional
 
-from .leddialog import LedDialog
 from .mousemap import MouseMap
 from .optionbutton import OptionButton
 from .ratbagd import RatbagdDevice, RatbagdLed, RatbagdProfile
-from .util.gobject import connect_signal_with_weak_ref
+from .util.gobject import WeakSignalGroup
+
+if TYPE_CHECKING:
+    from .leddialog import LedDialog
 
 import gi
 
@@ -30,26 +32,45 @@ class LedsPage(Gtk.Box):
         """
         Gtk.Box.__init__(self, *args, **kwargs)
         self._device = ratbagd_device
-
-        self._profile = profile
+        self._led_signals = WeakSignalGroup(self)
+        self._option_buttons: List[OptionButton] = []
+        self._led_indices: List[int] = []
 
         self._mousemap = MouseMap("#Leds", self._device, spacing=20, border_width=20)
         self.pack_start(self._mousemap, True, True, 0)
         self._sizegroup = Gtk.SizeGroup(mode=Gtk.SizeGroupMode.HORIZONTAL)
 
-        for led in profile.leds:
-            mode = _(RatbagdLed.LED_DESCRIPTION[led.mode])
-            button = OptionButton(mode)
-            button.connect("clicked", self._on_button_clicked, led)
+        self.set_profile(profile)
+        self.show_all()
 
-            connect_signal_with_weak_ref(
-                self, led, "notify::mode", self._on_led_mode_changed, button
-            )
+    def set_profile(self, profile: RatbagdProfile) -> None:
+        """Binds this page to the given profile, reusing the option buttons if
+        it has the same LEDs as the previous one.
 
-            self._mousemap.add(button, f"#led{led.index}")
-            self._sizegroup.add_widget(button)
+        @param profile The profile to configure, as ratbagd.RatbagdProfile
+        """
+        self._led_signals.disconnect_all()
+        self._profile = profile
 
-        self.show_all()
+        indices = [led.index for led in profile.leds]
+        if indices != self._led_indices:
+            for button in self._option_buttons:
+                button.destroy()
+            self._option_buttons = []
+            for position, index in enumerate(indices):
+                button = OptionButton()
+                button.connect("clicked", self._on_button_clicked, position)
+                self._mousemap.add(button, f"#led{index}")
+                self._sizegroup.add_widget(button)
+                self._option_buttons.append(button)
+            self._led_indices = indices
+            self._mousemap.show_all()
+
+        for led, button in zip(profile.leds, self._option_buttons):
+            self._on_led_mode_changed(led, None, button)
+            self._led_signals.connect(
+                led, "notify::mode", self._on_led_mode_changed, button
+            )
 
     def _on_led_mode_changed(
         self, led: RatbagdLed, pspec: Optional[GObject.ParamSpec], button: OptionButton
@@ -57,15 +78,19 @@ class LedsPage(Gtk.Box):
         mode = _(RatbagdLed.LED_DESCRIPTION[led.mode])
         button.set_label(mode)
 
-    def _on_button_clicked(self, button: OptionButton, led: RatbagdLed) -> None:
+    def _on_button_clicked(self, button: OptionButton, position: int) -> None:
         # Presents the LedDialog to configure the LED corresponding to the
         # clicked button.
+        led = self._profile.leds[position]
+        # The dialog is only imported once needed.
+        from .leddialog import LedDialog
+
         dialog = LedDialog(led, transient_for=self.get_toplevel())
         dialog.connect("response", self._on_dialog_response, led)
         dialog.present()
 
     def _on_dialog_response(
-        self, dialog: LedDialog, response: Gtk.ResponseType, led: RatbagdLed
+        self, dialog: "LedDialog", response: Gtk.ResponseType, led: RatbagdLed
     ) -> None:
         # The user either pressed cancel or apply. If it's apply, apply the
         # changes before closing the dialog, otherwise just close the dialog.
@@ -1,14 +1,16 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
+from collections import OrderedDict
 from typing import Any, List, Optional, Tuple
 
 import cairo
 import gi
+import math
 import sys
-from lxml import etree
 
-from piper.svg import get_svg
+from piper.svg import get_parsed_svg
 from .ratbagd import RatbagdDevice
+from .util import trace
 
 gi.require_version("Gdk", "3.0")
 gi.require_version("Gtk", "3.0")
@@ -70,6 +72,9 @@ class MouseMap(Gtk.Container):
 
     __gtype_name__ = "MouseMap"
 
+    # How many highlight masks to keep, see _get_highlight_mask().
+    _HIGHLIGHT_MASKS_MAX = 8
+
     __gproperties__ = {
         "spacing": (
             int,
@@ -82,6 +87,7 @@ class MouseMap(Gtk.Container):
         ),
     }
 
+    @trace.traced
     def __init__(
         self,
         layer: str,
@@ -108,12 +114,10 @@ class MouseMap(Gtk.Container):
         if ratbagd_device is None:
             raise ValueError("Device cannot be None")
         try:
-            svg_bytes = get_svg(ratbagd_device.model)
-            assert svg_bytes is not None
-            handle = Rsvg.Handle.new_from_data(svg_bytes)
-            assert handle is not None
-            self._handle: Rsvg.Handle = handle
-            self._svg_data = etree.fromstring(svg_bytes)
+            # Shared with the other maps and rows of this device, see
+            # get_parsed_svg().
+            self._svg = get_parsed_svg(ratbagd_device.model)
+            self._handle: Rsvg.Handle = self._svg.handle
         except FileNotFoundError as e:
             raise ValueError("Device has no image or its path is invalid") from e
 
@@ -125,6 +129,28 @@ class MouseMap(Gtk.Container):
         self._device = ratbagd_device
         self._children: List[_MouseMapChild] = []
         self._highlight_element: Optional[str] = None
+        # The top left corner of the centered SVG, computed when allocating,
+        # see _translate_to_origin().
+        self._origin: Optional[Tuple[int, int]] = None
+        # The natural width of the widest child on the left, as of the last
+        # do_get_preferred_width().
+        self._width_left = 0
+
+        # The #Device layer and the children's paths and leaders on top of it,
+        # rasterized for the scale factor in _layers_scale, see _draw_device().
+        self._device_surface: Optional[cairo.ImageSurface] = None
+        self._overlay_surface: Optional[cairo.ImageSurface] = None
+        self._layers_scale = 0
+        # Whether the map was drawn yet, only the first draw is traced.
+        self._drawn = False
+
+        # Alpha masks of recently highlighted elements, cropped to the element
+        # and keyed by (svg_id, scale factor), least recently used first. The
+        # values are (mask, x, y) where x and y are the mask's offset into the
+        # SVG, see _get_highlight_mask().
+        self._highlight_masks: OrderedDict[
+            Tuple[str, int], Tuple[cairo.ImageSurface, int, int]
+        ] = OrderedDict()
 
         # TODO: remove this when we're out of the transition to toned down SVGs
         device = self._handle.has_sub("#Device")
@@ -151,9 +177,11 @@ class MouseMap(Gtk.Container):
         ):
             return
 
-        is_left = self._xpath_has_style(svg_leader[1:], "text-align:end")
+        is_left = self._svg.is_left(svg_leader)
         child = _MouseMapChild(widget, is_left, svg_id)
         self._children.append(child)
+        self._overlay_surface = None
+        self._origin = None
         widget.connect("enter-notify-event", self._on_enter, child)
         widget.connect("leave-notify-event", self._on_leave)
         widget.set_parent(self)
@@ -168,6 +196,8 @@ class MouseMap(Gtk.Container):
                 if child.widget == widget:
                     self._children.remove(child)
                     child.widget.unparent()
+                    self._overlay_surface = None
+                    self._origin = None
                     break
 
     def do_forall(
@@ -233,6 +263,7 @@ class MouseMap(Gtk.Container):
         ]
         width_left = max(width_left, default=0)
         width_right = max(width_right, default=0)
+        self._width_left = width_left
         width += width_left + width_svg + width_right + self.spacing
         if width_left > 0:
             width += self.spacing
@@ -271,6 +302,9 @@ class MouseMap(Gtk.Container):
                           Gdk.Rectangle
         """
         self.set_allocation(allocation)
+        # Any change in the size of the children causes a new allocation, so
+        # this is the only place the origin needs to be computed.
+        self._origin = None
         x, y = self._translate_to_origin()
         child_allocation = Gdk.Rectangle()
 
@@ -301,6 +335,14 @@ class MouseMap(Gtk.Container):
 
         @param cr The Cairo context to draw into, as cairo.Context
         """
+        if self._drawn:
+            self._draw(cr)
+            return
+        self._drawn = True
+        with trace.span("MouseMap first draw", layer=self._layer):
+            self._draw(cr)
+
+    def _draw(self, cr: cairo.Context) -> None:
         scale_factor = self.get_scale_factor()
         target = cr.get_target()
         target.set_device_scale(scale_factor, scale_factor)
@@ -313,6 +355,12 @@ class MouseMap(Gtk.Container):
         for child in self._children:
             self.propagate_draw(child.widget, cr)
 
+    def do_style_updated(self) -> None:
+        """Drops the rasterized SVG layers when the theme changes, so they are
+        rendered again on the next draw."""
+        Gtk.Container.do_style_updated(self)
+        self._invalidate_layers()
+
     def do_get_property(self, prop: GObject.ParamSpec) -> Any:
         """Gets a property value.
 
@@ -340,46 +388,21 @@ class MouseMap(Gtk.Container):
         self._highlight_element = None
         self._redraw_svg_element(old_highlight)
 
-    def _xpath_has_style(self, svg_id: str, style: str) -> bool:
-        # Checks if the SVG element with the given identifier has the given
-        # style attribute set.
-        namespaces = {
-            "sodipodi": "http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd",
-            "cc": "http://web.resource.org/cc/",
-            "svg": "http://www.w3.org/2000/svg",
-            "dc": "http://purl.org/dc/elements/1.1/",
-            "xlink": "http://www.w3.org/1999/xlink",
-            "rdf": "http://www.w3.org/1999/02/22-rdf-syntax-ns#",
-            "inkscape": "http://www.inkscape.org/namespaces/inkscape",
-        }
-        query = f'//svg:rect[@id="{svg_id}"][contains(@style, "{style}")]'
-        element = self._svg_data.xpath(query, namespaces=namespaces)
-        return element is not None and len(element) == 1 and element[0] is not None
-
     def _get_svg_sub_geometry(self, svg_id: str) -> Tuple[bool, Gdk.Rectangle]:
         # Helper method to get an SVG element's x- and y-coordinates, width and
-        # height.
+        # height, as measured once per SVG by ParsedSvg.get_geometry().
         ret = Gdk.Rectangle()
-        ok, svg_pos = self._handle.get_position_sub(svg_id)
-        if not ok:
+        geometry = self._svg.get_geometry(svg_id)
+        if geometry is None:
             print(
-                "Warning: cannot retrieve element's position:", svg_id, file=sys.stderr
+                "Warning: cannot retrieve element's geometry:", svg_id, file=sys.stderr
             )
-            return ok, ret
-        ret.x = svg_pos.x
-        ret.y = svg_pos.y
-
-        ok, svg_dim = self._handle.get_dimensions_sub(svg_id)
-        if not ok:
-            print(
-                "Warning: cannot retrieve element's dimensions:",
-                svg_id,
-                file=sys.stderr,
-            )
-            return ok, ret
-        ret.width = svg_dim.width
-        ret.height = svg_dim.height
-        return ok, ret
+            return False, ret
+        ret.x = geometry.x
+        ret.y = geometry.y
+        ret.width = geometry.width
+        ret.height = geometry.height
+        return True, ret
 
     def _redraw_svg_element(self, svg_id: str) -> None:
         # Helper method to redraw an element of the SVG image. Attempts to
@@ -403,16 +426,20 @@ class MouseMap(Gtk.Container):
         # Translates the coordinate system such that the SVG and its buttons
         # will be drawn in the center of the allocated space. The returned x-
         # and y-coordinates will be the top left corner of the centered SVG.
+        # They are cached until the next allocation.
+        if self._origin is None:
+            self._origin = self._compute_origin()
+        return self._origin
+
+    def _compute_origin(self) -> Tuple[int, int]:
         allocation = self.get_allocation()
+        # GTK caches our size request until a child queues a resize, so this
+        # only measures the children if they changed. That also keeps
+        # self._width_left up to date.
         width = self.get_preferred_width()[1]
         height = self.get_preferred_height()[1]
 
-        width_left = [
-            child.widget.get_preferred_width()[1]
-            for child in self._children
-            if child.is_left
-        ]
-        width_left = max(width_left, default=0)
+        width_left = self._width_left
         if width_left > 0:
             width_left += self.spacing
 
@@ -423,24 +450,88 @@ class MouseMap(Gtk.Container):
     def _draw_device(self, cr: cairo.Context) -> None:
         # Draws the SVG into the Cairo context. If there is an element to be
         # highlighted, it will do as such in a separate surface which will be
-        # used as a mask over the device surface.
+        # used as a mask over the device surface. The device and the leaders
+        # don't change between draws, so they are rendered once per scale
+        # factor and blitted from then on.
         style_context = self.get_style_context()
         style_context.save()
         color = style_context.get_color(Gtk.StateFlags.LINK)
         style_context.restore()
         cr.set_source_rgba(color.red, color.green, color.blue, 0.5)
 
-        self._handle.render_cairo_sub(cr, id="#Device")
+        scale_factor = self.get_scale_factor()
+        if scale_factor != self._layers_scale:
+            self._invalidate_layers()
+            self._layers_scale = scale_factor
+        if self._device_surface is None:
+            self._device_surface = self._rasterize(["#Device"], scale_factor)
+        if self._overlay_surface is None:
+            svg_ids = []
+            for child in self._children:
+                svg_ids += [child.svg_path, child.svg_leader]
+            self._overlay_surface = self._rasterize(svg_ids, scale_factor)
+
+        cr.save()
+        cr.set_source_surface(self._device_surface, 0, 0)
+        cr.paint()
+        cr.restore()
         if self._highlight_element is not None:
-            svg_surface = cr.get_target()
-            highlight_surface = svg_surface.create_similar(
-                cairo.CONTENT_COLOR_ALPHA,
-                self._handle.props.width,
-                self._handle.props.height,
+            mask, mask_x, mask_y = self._get_highlight_mask(
+                self._highlight_element, scale_factor
             )
-            highlight_context = cairo.Context(highlight_surface)
-            self._handle.render_cairo_sub(highlight_context, self._highlight_element)
-            cr.mask_surface(highlight_surface, 0, 0)
-        for child in self._children:
-            self._handle.render_cairo_sub(cr, id=child.svg_path)
-            self._handle.render_cairo_sub(cr, id=child.svg_leader)
+            cr.mask_surface(mask, mask_x, mask_y)
+        cr.set_source_surface(self._overlay_surface, 0, 0)
+        cr.paint()
+
+    def _rasterize(self, svg_ids: List[str], scale_factor: int) -> cairo.ImageSurface:
+        # Renders the given SVG elements, in order, into a new image surface
+        # for the given scale factor.
+        surface = cairo.ImageSurface(
+            cairo.FORMAT_ARGB32,
+            math.ceil(self._handle.props.width * scale_factor),
+            math.ceil(self._handle.props.height * scale_factor),
+        )
+        surface.set_device_scale(scale_factor, scale_factor)
+        cr = cairo.Context(surface)
+        for svg_id in svg_ids:
+            self._handle.render_cairo_sub(cr, id=svg_id)
+        return surface
+
+    def _get_highlight_mask(
+        self, svg_id: str, scale_factor: int
+    ) -> Tuple[cairo.ImageSurface, int, int]:
+        # Returns the alpha mask of the given element, cropped to its bounding
+        # box, and the mask's offset into the SVG.
+        key = (svg_id, scale_factor)
+        if key in self._highlight_masks:
+            self._highlight_masks.move_to_end(key)
+            return self._highlight_masks[key]
+
+        geometry = self._svg.get_geometry(svg_id)
+        if geometry is None:
+            x, y = 0, 0
+            width = self._handle.props.width
+            height = self._handle.props.height
+        else:
+            # Leave a pixel for antialiasing on all sides.
+            x, y = geometry.x - 1, geometry.y - 1
+            width, height = geometry.width + 2, geometry.height + 2
+        mask = cairo.ImageSurface(
+            cairo.FORMAT_A8,
+            math.ceil(width * scale_factor),
+            math.ceil(height * scale_factor),
+        )
+        mask.set_device_scale(scale_factor, scale_factor)
+        cr = cairo.Context(mask)
+        cr.translate(-x, -y)
+        self._handle.render_cairo_sub(cr, id=svg_id)
+
+        self._highlight_masks[key] = (mask, x, y)
+        if len(self._highlight_masks) > self._HIGHLIGHT_MASKS_MAX:
+            self._highlight_masks.popitem(last=False)
+        return self._highlight_masks[key]
+
+    def _invalidate_layers(self) -> None:
+        # Drops the rasterized SVG layers, see _draw_device().
+        self._device_surface = None
+        self._overlay_surface = None
@@ -1,14 +1,11 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
 from gettext import gettext as _
-from typing import Optional
+from typing import TYPE_CHECKING, Callable, Dict, Optional, Union
 
-from .buttonspage import ButtonsPage
 from .profilerow import ProfileRow
 from .ratbagd import RatbagdDevice, RatbagdProfile
-from .resolutionspage import ResolutionsPage
-from .advancedpage import AdvancedPage
-from .ledspage import LedsPage
+from .util import trace
 from .util.gobject import connect_signal_with_weak_ref
 
 import gi
@@ -16,6 +13,89 @@ import gi
 gi.require_version("Gtk", "3.0")
 from gi.repository import GLib, GObject, Gtk  # noqa
 
+if TYPE_CHECKING:
+    from .advancedpage import AdvancedPage
+    from .buttonspage import ButtonsPage
+    from .ledspage import LedsPage
+    from .resolutionspage import ResolutionsPage
+
+    _Page = Union[ResolutionsPage, ButtonsPage, LedsPage, AdvancedPage]
+
+
+# The page factories for _LazyPage. The pages' modules pull in MouseMap and
+# the dialogs, so they are only imported once a page is built.
+
+
+def _new_resolutions_page(
+    device: RatbagdDevice, profile: RatbagdProfile
+) -> "ResolutionsPage":
+    from .resolutionspage import ResolutionsPage
+
+    return ResolutionsPage(device, profile)
+
+
+def _new_buttons_page(device: RatbagdDevice, profile: RatbagdProfile) -> "ButtonsPage":
+    from .buttonspage import ButtonsPage
+
+    return ButtonsPage(device, profile)
+
+
+def _new_leds_page(device: RatbagdDevice, profile: RatbagdProfile) -> "LedsPage":
+    from .ledspage import LedsPage
+
+    return LedsPage(device, profile)
+
+
+def _new_advanced_page(
+    device: RatbagdDevice, profile: RatbagdProfile
+) -> "AdvancedPage":
+    from .advancedpage import AdvancedPage
+
+    return AdvancedPage(device, profile)
+
+
+class _LazyPage(Gtk.Box):
+    """A stack page that stands in for a ResolutionsPage, ButtonsPage,
+    LedsPage or AdvancedPage and only builds it when shown for the first
+    time, see `build`. The page's module, e.g. `piper.buttonspage`, is only
+    imported then as well."""
+
+    def __init__(
+        self,
+        new_page: Callable[[RatbagdDevice, RatbagdProfile], "_Page"],
+        device: RatbagdDevice,
+        profile: RatbagdProfile,
+    ) -> None:
+        """Instantiates a new _LazyPage.
+
+        @param new_page The function building the page, e.g.
+                        _new_buttons_page
+        """
+        Gtk.Box.__init__(self)
+        self._new_page = new_page
+        self._device = device
+        self._profile = profile
+        self._page: Optional[_Page] = None
+        self.show()
+
+    def build(self) -> None:
+        """Builds the page, unless it was built already."""
+        if self._page is not None:
+            return
+        with trace.span("_LazyPage.build", page=self._new_page.__name__):
+            self._page = self._new_page(self._device, self._profile)
+        self.pack_start(self._page, True, True, 0)
+        self._page.show()
+
+    def set_profile(self, profile: RatbagdProfile) -> None:
+        """Binds the page to the given profile.
+
+        @param profile The profile to configure, as ratbagd.RatbagdProfile
+        """
+        self._profile = profile
+        if self._page is not None:
+            self._page.set_profile(profile)
+
 
 @Gtk.Template(resource_path="/org/freedesktop/Piper/ui/MousePerspective.ui")
 class MousePerspective(Gtk.Overlay):
@@ -23,6 +103,17 @@ class MousePerspective(Gtk.Overlay):
 
     __gtype_name__ = "MousePerspective"
 
+    # Emitted with the ValueError or GLib.Error raised when building a page
+    # after set_device() returned, e.g. for a device SVG that cannot be used.
+    # set_device() raises those itself.
+    __gsignals__ = {
+        "page-failed": (
+            GObject.SignalFlags.RUN_FIRST,
+            None,
+            (GObject.TYPE_PYOBJECT,),
+        ),
+    }
+
     _titlebar: Gtk.HeaderBar = Gtk.Template.Child()  # type: ignore
     add_profile_button: Gtk.Button = Gtk.Template.Child()  # type: ignore
     button_commit: Gtk.Button = Gtk.Template.Child()  # type: ignore
@@ -37,8 +128,14 @@ class MousePerspective(Gtk.Overlay):
         Gtk.Overlay.__init__(self, *args, **kwargs)
         self._device: Optional[RatbagdDevice] = None
         self._profile: Optional[RatbagdProfile] = None
+        # The stack pages by name, bound to self._profile.
+        self._pages: Dict[str, _LazyPage] = {}
         self._notification_error_timeout_id = 0
 
+        self._visible_child_handler = self.stack.connect(
+            "notify::visible-child", self._on_visible_child_changed
+        )
+
     @GObject.Property
     def name(self) -> str:
         """The name of this perspective."""
@@ -68,6 +165,7 @@ class MousePerspective(Gtk.Overlay):
         assert self._device is not None
         return self._device
 
+    @trace.traced
     def set_device(self, device: RatbagdDevice) -> None:
         self._device = device
         connect_signal_with_weak_ref(
@@ -80,9 +178,15 @@ class MousePerspective(Gtk.Overlay):
             self._on_active_profile_changed,
         )
 
+        # The pages are bound to the previous device's MouseMaps.
+        self.stack.foreach(Gtk.Widget.destroy)
+        self._pages = {}
         active_profile = device.active_profile
         assert active_profile is not None
         self._set_profile(active_profile)
+        # Only the active profile is needed to show the device, load the
+        # others when the main loop is idle.
+        device.load_profiles_in_idle()
 
         self.button_profile.set_visible(len(device.profiles) > 1)
 
@@ -115,32 +219,66 @@ class MousePerspective(Gtk.Overlay):
 
         self._profile = profile
 
-        self.stack.foreach(Gtk.Widget.destroy)
-        if profile.resolutions:
-            self.stack.add_titled(
-                ResolutionsPage(self._device, profile), "resolutions", _("Resolutions")
-            )
-        if profile.buttons:
-            self.stack.add_titled(
-                ButtonsPage(self._device, profile), "buttons", _("Buttons")
-            )
-        if profile.leds:
-            self.stack.add_titled(LedsPage(self._device, profile), "leds", _("LEDs"))
         # TODO: get rid of this duplicated logic.
         are_report_rates_supported = (
             profile.report_rate != 0 and len(profile.report_rates) != 0
         )
-        if (
-            profile.angle_snapping != -1
-            or profile.debounces
-            or are_report_rates_supported
-        ):
-            self.stack.add_titled(
-                AdvancedPage(self._device, profile), "advanced", _("Advanced")
-            )
+        pages = [
+            (
+                "resolutions",
+                _("Resolutions"),
+                _new_resolutions_page,
+                profile.resolutions,
+            ),
+            ("buttons", _("Buttons"), _new_buttons_page, profile.buttons),
+            ("leds", _("LEDs"), _new_leds_page, profile.leds),
+            (
+                "advanced",
+                _("Advanced"),
+                _new_advanced_page,
+                profile.angle_snapping != -1
+                or profile.debounces
+                or are_report_rates_supported,
+            ),
+        ]
+        # Rebind the pages of the previous profile rather than rebuilding
+        # them, which also keeps the visible page. New pages are only built
+        # once they're shown, see _on_visible_child_changed().
+        position = 0
+        with self.stack.handler_block(self._visible_child_handler):
+            for name, title, new_page, is_supported in pages:
+                page = self._pages.get(name)
+                if not is_supported:
+                    if page is not None:
+                        page.destroy()
+                        del self._pages[name]
+                    continue
+                if page is None:
+                    page = _LazyPage(new_page, self._device, profile)
+                    self.stack.add_titled(page, name, title)
+                    self.stack.child_set_property(page, "position", position)
+                    self._pages[name] = page
+                else:
+                    page.set_profile(profile)
+                position += 1
+        # Build the visible page here rather than from the signal handler, so
+        # errors, e.g. from an incompatible SVG, reach set_device()'s caller.
+        visible_page = self.stack.get_visible_child()
+        if isinstance(visible_page, _LazyPage):
+            visible_page.build()
 
         self._on_profile_notify_dirty(profile, None)
 
+    def _on_visible_child_changed(
+        self, stack: Gtk.Stack, pspec: Optional[GObject.ParamSpec]
+    ) -> None:
+        page = stack.get_visible_child()
+        if isinstance(page, _LazyPage):
+            try:
+                page.build()
+            except (ValueError, GLib.Error) as e:
+                self.emit("page-failed", e)
+
     def _hide_notification_error(self) -> None:
         if self._notification_error_timeout_id != 0:
             GLib.Source.remove(self._notification_error_timeout_id)
@@ -156,8 +294,10 @@ class MousePerspective(Gtk.Overlay):
     def _on_active_profile_changed(
         self, _device: RatbagdDevice, profile: RatbagdProfile
     ) -> None:
-        # TODO: preserve the active tab.
-        self._set_profile(profile)
+        try:
+            self._set_profile(profile)
+        except (ValueError, GLib.Error) as e:
+            self.emit("page-failed", e)
 
     def _on_notification_error_timeout(self) -> bool:
         self._hide_notification_error()
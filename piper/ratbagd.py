@@ -22,12 +22,16 @@
 import os
 import sys
 import hashlib
+import time
+import weakref
 
+from contextlib import contextmanager
 from enum import IntEnum
-from evdev import ecodes
 from gettext import gettext as _
 from gi.repository import Gio, GLib, GObject
-from typing import List, Optional, Tuple, Union
+from typing import IO, Dict, List, Optional, Tuple, Union
+
+from .util import trace
 
 
 # Deferred translations, see https://docs.python.org/3/library/gettext.html#deferred-translations
@@ -36,6 +40,9 @@ def N_(x):
 
 
 def evcode_to_str(evcode: int) -> str:
+    # evdev is slow to import and only needed once buttons are shown.
+    from evdev import ecodes
+
     # Values in ecodes.keys are stored as either a str or list[str].
     value = ecodes.keys[evcode]
     if isinstance(value, list):
@@ -140,63 +147,476 @@ EXCEPTION_TABLE = {
 }
 
 
+class DBusCallStats:
+    """Statistics of the calls to one ratbagd method, or of the writes to one
+    property, see `get_dbus_call_stats`. The latency of asynchronous calls
+    includes the time until the main loop dispatched the reply."""
+
+    # The upper bounds of the latency histogram's buckets in milliseconds.
+    # Slower calls count towards an extra, unbounded bucket.
+    BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000)
+
+    def __init__(self) -> None:
+        self.calls = 0
+        # Replies carrying a RatbagErrorCode other than SUCCESS, by code.
+        self.errors: Dict[RatbagErrorCode, int] = {}
+        self.timeouts = 0
+        # D-Bus errors other than timeouts, e.g. from an unknown method.
+        self.dbus_errors = 0
+        self.histogram = [0] * (len(self.BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(
+        self,
+        latency_ms: float,
+        error: Optional[RatbagErrorCode] = None,
+        timeout: bool = False,
+        dbus_error: bool = False,
+    ) -> None:
+        """Adds a call that took latency_ms milliseconds.
+
+        @param error The error code ratbagd replied with, if any
+        @param timeout Whether the call timed out
+        @param dbus_error Whether the call failed with another D-Bus error
+        """
+        self.calls += 1
+        if error is not None:
+            self.errors[error] = self.errors.get(error, 0) + 1
+        self.timeouts += timeout
+        self.dbus_errors += dbus_error
+        bucket = 0
+        while bucket < len(self.BUCKETS_MS) and latency_ms > self.BUCKETS_MS[bucket]:
+            bucket += 1
+        self.histogram[bucket] += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    def percentile_ms(self, percentile: float) -> float:
+        """Returns the upper bound of the histogram bucket that the given
+        percentile, from 0 to 100, of the latencies falls into. Calls slower
+        than the last bucket's bound are estimated as max_ms."""
+        rank = percentile / 100 * self.calls
+        seen = 0
+        for bound, count in zip(self.BUCKETS_MS, self.histogram):
+            seen += count
+            if seen >= rank and seen > 0:
+                return float(bound)
+        return self.max_ms
+
+    def __str__(self) -> str:
+        errors = ", ".join(f"{c.name}: {n}" for c, n in sorted(self.errors.items()))
+        return (
+            f"{self.calls} calls, mean {self.mean_ms:.1f} ms, "
+            f"p50 <= {self.percentile_ms(50):g} ms, "
+            f"p95 <= {self.percentile_ms(95):g} ms, max {self.max_ms:.1f} ms, "
+            f"{self.timeouts} timeouts, {self.dbus_errors} D-Bus errors, "
+            f"errors {{{errors}}}"
+        )
+
+
+# The call statistics by (interface, method or property), see
+# _RatbagdDBus._record_dbus_call().
+_dbus_call_stats: Dict[Tuple[str, str], DBusCallStats] = {}
+
+
+def get_dbus_call_stats() -> Dict[Tuple[str, str], DBusCallStats]:
+    """Returns the statistics of the calls made to ratbagd so far, by
+    interface and method or property name, e.g.
+    `("org.freedesktop.ratbag1.Device", "Commit")`. Property reads are served
+    from the proxies' caches and not counted, except for the GetAll calls
+    that load them."""
+    return dict(_dbus_call_stats)
+
+
+def reset_dbus_call_stats() -> None:
+    """Drops the statistics of all calls made to ratbagd so far."""
+    _dbus_call_stats.clear()
+
+
+def dump_dbus_call_stats(file: IO[str] = sys.stderr) -> None:
+    """Prints the statistics of the calls made to ratbagd so far, slowest
+    first by total time."""
+    print("D-Bus calls to ratbagd:", file=file)
+    stats = sorted(
+        _dbus_call_stats.items(), key=lambda item: item[1].total_ms, reverse=True
+    )
+    for (interface, member), call_stats in stats:
+        print(f"  {interface}.{member}: {call_stats}", file=file)
+
+
+def _get_error_code(result: GLib.Variant) -> Optional[RatbagErrorCode]:
+    # Returns the RatbagErrorCode of a method's reply, or None for replies
+    # without one or with SUCCESS. ratbagd returns them as unsigned integers.
+    if result.get_type_string() not in ("(u)", "(i)"):
+        return None
+    value = result.get_child_value(0).unpack()
+    if value >= 0x80000000:
+        value -= 0x100000000
+    try:
+        code = RatbagErrorCode(value)
+    except ValueError:
+        return None
+    return code if code != RatbagErrorCode.SUCCESS else None
+
+
+def set_write_behind_ms(write_behind_ms: int) -> None:
+    """Sets how long property writes are held back so that repeated writes to
+    the same property, e.g. from a slider being dragged, are coalesced into
+    one. 0 sends every write immediately. Defaults to 50 ms.
+
+    @param write_behind_ms The time to hold writes back for, in milliseconds
+    """
+    _RatbagdDBus.write_behind_ms = write_behind_ms
+
+
 class _RatbagdDBus(GObject.GObject):
     _dbus = None
 
-    def __init__(self, interface, object_path):
+    # The proxies created by _prefetch_proxies(), by (interface, object
+    # path), and our PropertiesChanged subscriptions for them, by name owner.
+    # GDBus does not watch PropertiesChanged for proxies that don't load their
+    # properties themselves, so we do that for them. Objects drop their
+    # proxies from here once removed, see _release().
+    _prefetched_proxies: (
+        "weakref.WeakValueDictionary[Tuple[str, str], Gio.DBusProxy]"
+    ) = weakref.WeakValueDictionary()
+    _prefetched_subscriptions: Dict[str, int] = {}
+
+    # How long property writes are held back so that repeated writes to the
+    # same property, e.g. from a slider being dragged, can be coalesced into
+    # one. 0 sends every write immediately. Set with set_write_behind_ms().
+    write_behind_ms = 50
+
+    # Queued property writes by (object path, property), see
+    # _set_dbus_property_async().
+    _pending_writes: Dict[
+        Tuple[str, str],
+        Tuple["_RatbagdDBus", GLib.Variant, Optional[GLib.Variant], List],
+    ] = {}
+    _flush_source_id = 0
+
+    # The number of sent property writes that ratbagd has not replied to yet
+    # and the last value ratbagd confirmed before them, by (object path,
+    # property), see _send_dbus_property().
+    _writes_in_flight: Dict[Tuple[str, str], Tuple[int, Optional[GLib.Variant]]] = {}
+
+    # The objects whose notifications are held back by the current
+    # RatbagdDevice.transaction(), by object path, or None outside of one.
+    _transaction_objects: Optional[Dict[str, "_RatbagdDBus"]] = None
+
+    def __init__(self, interface, object_path, proxies=None):
         super().__init__()
 
+        ratbag1 = _RatbagdDBus._get_bus_name()
+
+        if object_path is None:
+            object_path = "/" + ratbag1.replace(".", "/")
+
+        self._object_path = object_path
+        self._interface = f"{ratbag1}.{interface}"
+
+        # Properties that only change when the device is resynced, unpacked
+        # once, see _get_static_dbus_property().
+        self._static_properties: Dict[str, object] = {}
+
+        # Use the proxy from a bulk prefetch if we have one, see
+        # _prefetch_proxies().
+        if proxies is not None and object_path in proxies:
+            self._proxy = proxies[object_path]
+        else:
+            try:
+                with trace.span("Gio.DBusProxy.new_sync", object_path=object_path):
+                    self._proxy = Gio.DBusProxy.new_sync(
+                        _RatbagdDBus._get_connection(),
+                        Gio.DBusProxyFlags.NONE,
+                        None,
+                        ratbag1,
+                        object_path,
+                        self._interface,
+                        None,
+                    )
+            except GLib.Error as e:
+                raise RatbagdUnavailableError(e.message) from e
+
+        if self._proxy.get_name_owner() is None:
+            raise RatbagdUnavailableError(f"No one currently owns {ratbag1}")
+
+        # Our handlers on the proxy, see _disconnect_proxy().
+        self._proxy_handlers = [
+            self._proxy.connect("g-properties-changed", self._on_properties_changed),
+            self._proxy.connect("g-signal", self._on_signal_received),
+        ]
+
+    def _disconnect_proxy(self):
+        # Stops following the object's property changes and signals.
+        for handler in self._proxy_handlers:
+            self._proxy.disconnect(handler)
+        self._proxy_handlers = []
+
+    def _release(self):
+        # Called once ratbagd removed the object or we stopped following it.
+        # Its proxy no longer gets the PropertiesChanged of a new object at
+        # the same path. Extend this in derived classes that own other objects.
+        self._disconnect_proxy()
+        key = (self._interface, self._object_path)
+        if _RatbagdDBus._prefetched_proxies.get(key) is self._proxy:
+            del _RatbagdDBus._prefetched_proxies[key]
+
+    @staticmethod
+    def _get_connection():
+        # Returns the shared system bus connection.
         if _RatbagdDBus._dbus is None:
             try:
-                _RatbagdDBus._dbus = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
+                with trace.span("Gio.bus_get_sync"):
+                    _RatbagdDBus._dbus = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
             except GLib.Error as e:
                 raise RatbagdUnavailableError(e.message) from e
+        return _RatbagdDBus._dbus
 
-        ratbag1 = "org.freedesktop.ratbag1"
+    @staticmethod
+    def _get_bus_name():
         if os.environ.get("RATBAG_TEST"):
-            ratbag1 = "org.freedesktop.ratbag_devel1"
+            return "org.freedesktop.ratbag_devel1"
+        return "org.freedesktop.ratbag1"
 
-        if object_path is None:
-            object_path = "/" + ratbag1.replace(".", "/")
+    @staticmethod
+    @trace.traced
+    def _prefetch_proxies(
+        objects: List[Tuple[str, str]], name_owner: Optional[str]
+    ) -> Dict[str, Gio.DBusProxy]:
+        """Creates proxies for the given (interface, object path) pairs and
+        loads their properties with a single batch of concurrent GetAll calls,
+        so the cost is one round trip no matter how many objects there are.
+
+        The proxies are bound to the daemon's unique name, which lets GDBus
+        skip the per-proxy GetNameOwner and GetAll round trips that
+        Gio.DBusProxy.new_sync() does.
+
+        @param objects The objects to load, as [(interface, object path)]
+        @param name_owner The unique bus name of ratbagd, as str, or None if
+                          ratbagd is gone
+
+        @returns A dict mapping each object path to its Gio.DBusProxy, empty
+                 if name_owner is None
+
+        @raises RatbagdUnavailableError when any of the objects cannot be
+                                        loaded.
+        """
+        if name_owner is None:
+            # ratbagd went away, e.g. while a signal from it was queued. Don't
+            # subscribe, a subscription without a sender would match every
+            # sender. The objects fall back to Gio.DBusProxy.new_sync(), which
+            # fails like it did before prefetching.
+            return {}
+
+        connection = _RatbagdDBus._get_connection()
+        ratbag1 = _RatbagdDBus._get_bus_name()
+        proxies = {}
+        errors = []
+        pending = len(objects)
+
+        def on_get_all_finished(connection, task, proxy):
+            nonlocal pending
+            pending -= 1
+            interface = proxy.get_interface_name()
+            try:
+                result = connection.call_finish(task)
+            except GLib.Error as e:
+                timeout = e.code == Gio.IOErrorEnum.TIMED_OUT
+                _RatbagdDBus._record_dbus_call(
+                    interface, "GetAll", start, timeout=timeout, dbus_error=not timeout
+                )
+                errors.append(e)
+                return
+            _RatbagdDBus._record_dbus_call(interface, "GetAll", start)
+            properties = result.get_child_value(0)
+            for i in range(properties.n_children()):
+                entry = properties.get_child_value(i)
+                proxy.set_cached_property(
+                    entry.get_child_value(0).get_string(),
+                    entry.get_child_value(1).get_variant(),
+                )
+
+        if name_owner not in _RatbagdDBus._prefetched_subscriptions:
+            _RatbagdDBus._prefetched_subscriptions[name_owner] = (
+                connection.signal_subscribe(
+                    name_owner,
+                    "org.freedesktop.DBus.Properties",
+                    "PropertiesChanged",
+                    None,
+                    None,
+                    Gio.DBusSignalFlags.NONE,
+                    _RatbagdDBus._on_prefetched_properties_changed,
+                )
+            )
 
-        self._object_path = object_path
-        self._interface = f"{ratbag1}.{interface}"
+        for interface, object_path in objects:
+            interface_name = f"{ratbag1}.{interface}"
+            try:
+                proxies[object_path] = Gio.DBusProxy.new_sync(
+                    connection,
+                    Gio.DBusProxyFlags.DO_NOT_LOAD_PROPERTIES,
+                    None,
+                    name_owner,
+                    object_path,
+                    interface_name,
+                    None,
+                )
+            except GLib.Error as e:
+                raise RatbagdUnavailableError(e.message) from e
+            key = (interface_name, object_path)
+            _RatbagdDBus._prefetched_proxies[key] = proxies[object_path]
+
+        # Run the replies on a private context so we don't dispatch anything
+        # else (UI events, signals) while constructing objects. The proxies
+        # must be created before this, or their signal subscriptions would be
+        # bound to the private context too.
+        context = GLib.MainContext.new()
+        context.push_thread_default()
+        # The calls go out together, so each one's latency is measured from
+        # the start of the batch.
+        start = time.perf_counter()
+        try:
+            for interface, object_path in objects:
+                connection.call(
+                    name_owner,
+                    object_path,
+                    "org.freedesktop.DBus.Properties",
+                    "GetAll",
+                    GLib.Variant("(s)", (f"{ratbag1}.{interface}",)),
+                    GLib.VariantType("(a{sv})"),
+                    Gio.DBusCallFlags.NO_AUTO_START,
+                    2000,
+                    None,
+                    on_get_all_finished,
+                    proxies[object_path],
+                )
+            while pending > 0:
+                context.iteration(True)
+        finally:
+            context.pop_thread_default()
+
+        if errors:
+            raise RatbagdUnavailableError(errors[0].message) from errors[0]
+        return proxies
+
+    @staticmethod
+    def _on_prefetched_properties_changed(
+        connection, sender_name, object_path, interface_name, signal_name, parameters
+    ):
+        # Does for prefetched proxies what GDBus does for all other proxies:
+        # update the cached properties and emit g-properties-changed.
+        interface = parameters.get_child_value(0).get_string()
+        proxy = _RatbagdDBus._prefetched_proxies.get((interface, object_path))
+        if proxy is None:
+            return
+
+        # Skip the properties with a write still queued, the change is most
+        # likely the echo of an earlier write and our local copy is newer.
+        # The queued write's own echo brings ratbagd's value back.
+        pending = _RatbagdDBus._pending_writes
+        changed = {}
+        changed_props = parameters.get_child_value(1)
+        for i in range(changed_props.n_children()):
+            entry = changed_props.get_child_value(i)
+            name = entry.get_child_value(0).get_string()
+            if (object_path, name) not in pending:
+                changed[name] = entry.get_child_value(1).get_variant()
+        invalidated_props = [
+            name
+            for name in parameters.get_child_value(2).get_strv()
+            if (object_path, name) not in pending
+        ]
+        if not changed and not invalidated_props:
+            return
+
+        for name, value in changed.items():
+            proxy.set_cached_property(name, value)
+        for name in invalidated_props:
+            proxy.set_cached_property(name, None)
+        if len(changed) != changed_props.n_children():
+            changed_props = GLib.Variant("a{sv}", changed)
+        proxy.emit("g-properties-changed", changed_props, invalidated_props)
 
+    @staticmethod
+    def _drop_prefetched_subscriptions(name_owner: Optional[str]) -> None:
+        # Unsubscribes from the PropertiesChanged of all name owners but
+        # name_owner, e.g. of a ratbagd that went away.
+        subscriptions = _RatbagdDBus._prefetched_subscriptions
+        for owner in [o for o in subscriptions if o != name_owner]:
+            _RatbagdDBus._get_connection().signal_unsubscribe(subscriptions.pop(owner))
+
+    @staticmethod
+    def _get_name_owner() -> str:
+        # Returns the unique bus name of ratbagd.
+        ratbag1 = _RatbagdDBus._get_bus_name()
         try:
-            self._proxy = Gio.DBusProxy.new_sync(
-                _RatbagdDBus._dbus,
-                Gio.DBusProxyFlags.NONE,
-                None,
-                ratbag1,
-                object_path,
-                self._interface,
+            result = _RatbagdDBus._get_connection().call_sync(
+                "org.freedesktop.DBus",
+                "/org/freedesktop/DBus",
+                "org.freedesktop.DBus",
+                "GetNameOwner",
+                GLib.Variant("(s)", (ratbag1,)),
+                GLib.VariantType("(s)"),
+                Gio.DBusCallFlags.NONE,
+                2000,
                 None,
             )
         except GLib.Error as e:
             raise RatbagdUnavailableError(e.message) from e
+        return result.unpack()[0]
 
-        if self._proxy.get_name_owner() is None:
-            raise RatbagdUnavailableError(f"No one currently owns {ratbag1}")
+    # Maps the names of D-Bus properties that derived classes keep a copy of
+    # to (attribute name, GObject property name), see _on_properties_changed().
+    _cached_properties: Dict[str, Tuple[str, str]] = {}
 
-        self._proxy.connect("g-properties-changed", self._on_properties_changed)
-        self._proxy.connect("g-signal", self._on_signal_received)
+    # Maps the names of D-Bus properties that derived classes read from the
+    # proxy to the GObject property notified when they change.
+    _notified_properties: Dict[str, str] = {}
 
     def _on_properties_changed(self, proxy, changed_props, invalidated_props):
-        # Implement this in derived classes to respond to property changes.
-        pass
+        # Updates the attributes of the changed properties listed in
+        # _cached_properties and notifies their GObject properties. Override
+        # this in derived classes to respond to other property changes.
+        with self.freeze_notify():
+            for i in range(changed_props.n_children()):
+                entry = changed_props.get_child_value(i)
+                name = entry.get_child_value(0).get_string()
+                self._on_cached_property_changed(name)
+                if name in self._notified_properties:
+                    self.notify(self._notified_properties[name])
+                cached = self._cached_properties.get(name)
+                if cached is None:
+                    continue
+                attr, prop = cached
+                value = self._convert_dbus_property(
+                    name, entry.get_child_value(1).get_variant().unpack()
+                )
+                if value != getattr(self, attr):
+                    setattr(self, attr, value)
+                    self.notify(prop)
+
+    def _on_cached_property_changed(self, property):
+        # Called whenever our local copy of a property changed, either from
+        # PropertiesChanged or from setting it ourselves. Extend this in
+        # derived classes that keep values decoded from a property.
+        self._static_properties.pop(property, None)
+
+    def _convert_dbus_property(self, name, value):
+        # Converts the unpacked value of a changed property listed in
+        # _cached_properties before it is stored. Override this in derived
+        # classes that don't store the D-Bus value as is.
+        return value
 
     def _on_signal_received(self, proxy, sender_name, signal_name, parameters):
         # Implement this in derived classes to respond to signals.
         pass
 
-    def _find_object_with_path(self, iterable, object_path):
-        # Find the index of an object in an iterable that whose object path
-        # matches the given object path.
-        for index, obj in enumerate(iterable):
-            if obj._object_path == object_path:
-                return index
-        return -1
-
     def _get_dbus_property(self, property):
         # Retrieves a cached property from the bus, or None.
         p = self._proxy.get_cached_property(property)
@@ -204,6 +624,23 @@ class _RatbagdDBus(GObject.GObject):
             return p.unpack()
         return p
 
+    def _get_static_dbus_property(self, property, convert=None):
+        # Retrieves a property that only changes when the device is resynced.
+        # It is unpacked, and converted with convert() if given, on first
+        # access only. Use this for properties that are read in hot paths,
+        # e.g. the lists of supported values.
+        if property not in self._static_properties:
+            value = self._get_dbus_property(property)
+            if convert is not None:
+                value = convert(value or ())
+            self._static_properties[property] = value
+        return self._static_properties[property]
+
+    def _invalidate_static_properties(self):
+        # Drops the values cached by _get_static_dbus_property(), called when
+        # the device is resynced.
+        self._static_properties.clear()
+
     def _get_dbus_property_nonnull(self, property: str):
         p = self._get_dbus_property(property)
         if p is None:
@@ -220,7 +657,10 @@ class _RatbagdDBus(GObject.GObject):
         val = GLib.Variant(f"{type}", value)
         if readwrite:
             pval = GLib.Variant("(ssv)", (self._interface, property, val))
-            self._proxy.call_sync(
+            self._finish_dbus_call(
+                property,
+                time.perf_counter(),
+                self._proxy.call_sync,
                 "org.freedesktop.DBus.Properties.Set",
                 pval,
                 Gio.DBusCallFlags.NO_AUTO_START,
@@ -231,6 +671,149 @@ class _RatbagdDBus(GObject.GObject):
         # This is our local copy, so we don't have to wait for the async
         # update
         self._proxy.set_cached_property(property, val)
+        self._on_cached_property_changed(property)
+
+    def _set_dbus_property_async(self, property, type, value, callback=None):
+        # Sets a property on the bus without blocking the main loop.
+        #
+        # The local copy is updated immediately. If the call fails, it is
+        # restored to the last value ratbagd confirmed and notified, so
+        # widgets showing the failed value resync. The write itself is queued
+        # for write_behind_ms, and repeated writes to the same property within
+        # that window are coalesced so only the last value is sent, see
+        # _flush_pending_writes().
+        #
+        # Once the call has finished, callback is invoked from the main loop
+        # with (None, error), where error is None on success or the exception
+        # _dbus_call would have raised. Without a callback, errors are printed
+        # to stderr.
+        val = GLib.Variant(f"{type}", value)
+        key = (self._object_path, property)
+        pending = _RatbagdDBus._pending_writes.pop(key, None)
+        if pending is None:
+            in_flight = _RatbagdDBus._writes_in_flight.get(key)
+            if in_flight is not None:
+                # Our local copy is the value of a write without a reply yet.
+                old = in_flight[1]
+            else:
+                old = self._proxy.get_cached_property(property)
+            callbacks = []
+        else:
+            _, _, old, callbacks = pending
+        if callback is not None:
+            callbacks.append(callback)
+
+        self._proxy.set_cached_property(property, val)
+        self._on_cached_property_changed(property)
+        _RatbagdDBus._pending_writes[key] = (self, val, old, callbacks)
+
+        transaction = _RatbagdDBus._transaction_objects
+        if transaction is not None:
+            # Sent when the transaction ends.
+            if self._object_path not in transaction:
+                self.freeze_notify()
+                transaction[self._object_path] = self
+        elif _RatbagdDBus.write_behind_ms <= 0:
+            _RatbagdDBus._flush_pending_writes()
+        elif _RatbagdDBus._flush_source_id == 0:
+            _RatbagdDBus._flush_source_id = GLib.timeout_add(
+                _RatbagdDBus.write_behind_ms, _RatbagdDBus._on_flush_timeout
+            )
+
+    @staticmethod
+    def _on_flush_timeout():
+        _RatbagdDBus._flush_source_id = 0
+        _RatbagdDBus._flush_pending_writes()
+        return GLib.SOURCE_REMOVE
+
+    @staticmethod
+    def _flush_pending_writes(on_flushed=None):
+        # Sends all queued property writes, in the order their properties
+        # were last written. Method calls go out on the same connection, so
+        # flushing before them guarantees ratbagd sees the writes first.
+        #
+        # on_flushed is invoked without arguments once ratbagd has replied to
+        # all of the writes.
+        if _RatbagdDBus._flush_source_id != 0:
+            GLib.source_remove(_RatbagdDBus._flush_source_id)
+            _RatbagdDBus._flush_source_id = 0
+
+        pending_writes = _RatbagdDBus._pending_writes
+        _RatbagdDBus._pending_writes = {}
+        remaining = len(pending_writes)
+
+        def on_sent():
+            nonlocal remaining
+            remaining -= 1
+            if remaining == 0 and on_flushed is not None:
+                on_flushed()
+
+        if remaining == 0 and on_flushed is not None:
+            on_flushed()
+        for (_path, property), (obj, val, old, callbacks) in pending_writes.items():
+            obj._send_dbus_property(property, val, old, callbacks, on_sent)
+
+    def _send_dbus_property(self, property, val, old, callbacks, on_sent):
+        # Sends a queued property write, see _set_dbus_property_async().
+        pval = GLib.Variant("(ssv)", (self._interface, property, val))
+        key = (self._object_path, property)
+        in_flight = _RatbagdDBus._writes_in_flight
+        count, _ = in_flight.get(key, (0, None))
+        in_flight[key] = (count + 1, old)
+
+        def on_finished(result, error):
+            # A raising callback must not keep on_flushed from running, e.g.
+            # the notifications of a transaction would stay frozen.
+            try:
+                count, remote = in_flight.pop(key)
+                if error is None:
+                    remote = val
+                if count > 1:
+                    in_flight[key] = (count - 1, remote)
+                pending = _RatbagdDBus._pending_writes.get(key)
+                if pending is not None:
+                    # The value restored if the newer write fails too.
+                    obj, pending_val, _, pending_callbacks = pending
+                    _RatbagdDBus._pending_writes[key] = (
+                        obj,
+                        pending_val,
+                        remote,
+                        pending_callbacks,
+                    )
+                elif error is not None and count == 1 and remote is not None:
+                    # Unless a newer value is still on its way.
+                    self._restore_dbus_property(property, remote)
+                for callback in callbacks:
+                    callback(result, error)
+                if not callbacks and error is not None:
+                    print(f"Failed to set {property}: {error}", file=sys.stderr)
+            finally:
+                on_sent()
+
+        self._proxy.call(
+            "org.freedesktop.DBus.Properties.Set",
+            pval,
+            Gio.DBusCallFlags.NO_AUTO_START,
+            2000,
+            None,
+            self._on_dbus_call_finished,
+            (property, time.perf_counter(), on_finished),
+        )
+
+    def _restore_dbus_property(self, property, value):
+        # Puts back value, the last one ratbagd confirmed, as our local copy
+        # of a property whose write failed, and notifies the property even if
+        # our copy didn't change: widgets already show the failed value.
+        self._proxy.set_cached_property(property, value)
+        self._on_cached_property_changed(property)
+        cached = self._cached_properties.get(property)
+        if cached is not None:
+            attr, prop = cached
+            setattr(self, attr, self._convert_dbus_property(property, value.unpack()))
+        else:
+            prop = self._notified_properties.get(property)
+        if prop is not None:
+            self.notify(prop)
 
     def _dbus_call(self, method, type, *value):
         # Calls a method synchronously on the bus, using the given method name,
@@ -240,22 +823,105 @@ class _RatbagdDBus(GObject.GObject):
         # appropriate RatbagError* or RatbagdDBus* exception, or GLib.Error if
         # it is an unexpected exception that probably shouldn't be passed up to
         # the UI.
+        _RatbagdDBus._flush_pending_writes()
         val = GLib.Variant(f"({type})", value)
+        return self._finish_dbus_call(
+            method,
+            time.perf_counter(),
+            self._proxy.call_sync,
+            method,
+            val,
+            Gio.DBusCallFlags.NO_AUTO_START,
+            2000,
+            None,
+        )
+
+    def _dbus_call_async(self, method, type, *value, callback=None):
+        # Calls a method on the bus without blocking the main loop.
+        #
+        # Once the call has finished, callback is invoked from the main loop
+        # with (result, error): the result _dbus_call would have returned and
+        # None, or None and the exception _dbus_call would have raised. Without
+        # a callback, errors are printed to stderr.
+        _RatbagdDBus._flush_pending_writes()
+        val = GLib.Variant(f"({type})", value)
+        self._proxy.call(
+            method,
+            val,
+            Gio.DBusCallFlags.NO_AUTO_START,
+            2000,
+            None,
+            self._on_dbus_call_finished,
+            (method, time.perf_counter(), callback),
+        )
+
+    def _dbus_call_and_set_async(self, method, property, callback=None):
+        # Calls a method that sets a boolean property, e.g. SetActive and
+        # IsActive, without blocking the main loop. Our local copy of the
+        # property is set once the call succeeded. callback is invoked as
+        # described in _dbus_call_async.
+        def on_finished(result, error):
+            if error is None:
+                self._set_dbus_property(property, "b", True, readwrite=False)
+            if callback is not None:
+                callback(result, error)
+            elif error is not None:
+                print(
+                    f"{method} on {self._object_path} failed: {error}", file=sys.stderr
+                )
+
+        self._dbus_call_async(method, "", callback=on_finished)
+
+    def _on_dbus_call_finished(self, proxy, task, user_data):
+        member, start, callback = user_data
+        result = None
+        error = None
         try:
-            res = self._proxy.call_sync(
-                method, val, Gio.DBusCallFlags.NO_AUTO_START, 2000, None
-            )
-            if res in EXCEPTION_TABLE:
-                raise EXCEPTION_TABLE[res]
-            return res.unpack()[0]  # Result is always a tuple
+            result = self._finish_dbus_call(member, start, proxy.call_finish, task)
+        except (RatbagError, RatbagdDBusTimeoutError, GLib.Error) as e:
+            error = e
+
+        if callback is not None:
+            callback(result, error)
+        elif error is not None:
+            print(f"D-Bus call on {self._object_path} failed: {error}", file=sys.stderr)
+
+    def _finish_dbus_call(self, member, start, finish, *args):
+        # Runs the given call_sync or call_finish function and maps its result
+        # and errors as described in _dbus_call. The call to the method or
+        # property member, started at start, is recorded in the statistics,
+        # see get_dbus_call_stats().
+        try:
+            res = finish(*args)
         except GLib.Error as e:
-            if e.code == Gio.IOErrorEnum.TIMED_OUT:
+            timeout = e.code == Gio.IOErrorEnum.TIMED_OUT
+            self._record_dbus_call(
+                self._interface, member, start, timeout=timeout, dbus_error=not timeout
+            )
+            if timeout:
                 raise RatbagdDBusTimeoutError(e.message) from e
 
             # Unrecognized error code.
             print(e.message, file=sys.stderr)
             raise
 
+        code = _get_error_code(res)
+        self._record_dbus_call(self._interface, member, start, error=code)
+        if code is not None:
+            raise EXCEPTION_TABLE[code](f"{member} failed with {code.name}")
+        res = res.unpack()  # Result is always a tuple
+        return res[0] if res else None
+
+    @staticmethod
+    def _record_dbus_call(interface, member, start, **outcome):
+        # Adds a call started at start, a time.perf_counter() timestamp, to
+        # the statistics, see DBusCallStats.record() for the outcome.
+        key = (interface, member)
+        stats = _dbus_call_stats.get(key)
+        if stats is None:
+            stats = _dbus_call_stats[key] = DBusCallStats()
+        stats.record((time.perf_counter() - start) * 1000, **outcome)
+
     def __eq__(self, other):
         return other and self._object_path == other._object_path
 
@@ -278,6 +944,7 @@ class Ratbagd(_RatbagdDBus):
         "daemon-disappeared": (GObject.SignalFlags.RUN_FIRST, None, ()),
     }
 
+    @trace.traced
     def __init__(self, api_version):
         super().__init__("Manager", None)
         result = self._get_dbus_property("Devices")
@@ -287,12 +954,45 @@ class Ratbagd(_RatbagdDBus):
             )
         if self.api_version != api_version:
             raise RatbagdIncompatibleError(self.api_version or -1, api_version)
-        self._devices = [RatbagdDevice(objpath) for objpath in result or []]
-        self._proxy.connect("notify::g-name-owner", self._on_name_owner_changed)
+        # The devices by object path, in the order ratbagd lists them, and by
+        # id. self._devices is the list handed out by the devices property.
+        self._devices_by_path: Dict[str, RatbagdDevice] = {}
+        self._devices_by_id: Dict[str, RatbagdDevice] = {}
+        for device in self._new_devices(result or []):
+            self._devices_by_path[device._object_path] = device
+            self._devices_by_id[device.id] = device
+        self._devices = list(self._devices_by_path.values())
+        self._proxy_handlers.append(
+            self._proxy.connect("notify::g-name-owner", self._on_name_owner_changed)
+        )
 
     def _on_name_owner_changed(self, *kwargs):
+        _RatbagdDBus._drop_prefetched_subscriptions(self._proxy.get_name_owner())
         self.emit("daemon-disappeared")
 
+    def _new_devices(self, object_paths):
+        # Builds the devices with the given object paths, loading all of their
+        # objects in a few batched round trips. Devices that cannot be loaded,
+        # e.g. because they were unplugged again right away, are skipped and
+        # retried the next time the Devices property changes.
+        name_owner = self._proxy.get_name_owner()
+        if name_owner is None:
+            # ratbagd went away, daemon-disappeared is emitted for that.
+            return []
+        try:
+            proxies = RatbagdDevice._prefetch_tree(object_paths, name_owner)
+        except RatbagdUnavailableError as e:
+            if len(object_paths) == 1:
+                print(f"Cannot load device {object_paths[0]}: {e}", file=sys.stderr)
+                return []
+            # Load them one by one to skip only the ones that failed.
+            return [
+                device
+                for object_path in object_paths
+                for device in self._new_devices([object_path])
+            ]
+        return [RatbagdDevice(objpath, proxies) for objpath in object_paths]
+
     def _on_properties_changed(self, proxy, changed_props, invalidated_props):
         try:
             new_device_object_paths = changed_props["Devices"]
@@ -300,16 +1000,28 @@ class Ratbagd(_RatbagdDBus):
             # Different property changed, skip.
             pass
         else:
-            object_paths = [d._object_path for d in self._devices]
-            for object_path in new_device_object_paths:
-                if object_path not in object_paths:
-                    device = RatbagdDevice(object_path)
-                    self._devices.append(device)
-                    self.emit("device-added", device)
-            for device in self.devices:
-                if device._object_path not in new_device_object_paths:
-                    self._devices.remove(device)
-                    self.emit("device-removed", device)
+            new_object_paths = set(new_device_object_paths)
+            added = [
+                p for p in new_device_object_paths if p not in self._devices_by_path
+            ]
+            removed = [p for p in self._devices_by_path if p not in new_object_paths]
+
+            new_devices = self._new_devices(added)
+            for device in new_devices:
+                self._devices_by_path[device._object_path] = device
+                self._devices_by_id[device.id] = device
+            removed_devices = []
+            for object_path in removed:
+                device = self._devices_by_path.pop(object_path)
+                del self._devices_by_id[device.id]
+                removed_devices.append(device)
+            self._devices = list(self._devices_by_path.values())
+
+            for device in new_devices:
+                self.emit("device-added", device)
+            for device in removed_devices:
+                self.emit("device-removed", device)
+                device._release()
             self.notify("devices")
 
     @GObject.Property
@@ -323,16 +1035,21 @@ class Ratbagd(_RatbagdDBus):
 
     def __getitem__(self, id):
         """Returns the requested device, or None."""
-        for d in self.devices:
-            if d.id == id:
-                return d
-        return None
+        return self._devices_by_id.get(id)
 
     def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        pass
+        self.close()
+
+    def close(self):
+        """Stops following ratbagd: devices are no longer added or removed,
+        and neither this object nor its devices emit signals for changes in
+        ratbagd anymore."""
+        self._release()
+        for device in self._devices:
+            device._release()
 
 
 class RatbagdDevice(_RatbagdDBus):
@@ -347,21 +1064,93 @@ class RatbagdDevice(_RatbagdDBus):
         "resync": (GObject.SignalFlags.RUN_FIRST, None, ()),
     }
 
-    def __init__(self, object_path):
-        super().__init__("Device", object_path)
+    @trace.traced
+    def __init__(self, object_path, proxies=None):
+        if proxies is None:
+            proxies = RatbagdDevice._prefetch_tree(
+                [object_path], _RatbagdDBus._get_name_owner()
+            )
+        super().__init__("Device", object_path, proxies)
 
         # FIXME: if we start adding and removing objects from this list,
         # things will break!
         result = self._get_dbus_property("Profiles") or []
-        self._profiles = [RatbagdProfile(objpath) for objpath in result]
+        self._profiles = [RatbagdProfile(objpath, proxies) for objpath in result]
         for profile in self._profiles:
             profile.connect("notify::is-active", self._on_active_profile_changed)
 
         # Use a SHA1 of our object path as our device's ID
         self._id = hashlib.sha1(object_path.encode("utf-8")).hexdigest()
 
+        self._idle_load_id = 0
+
+    @staticmethod
+    def _prefetch_tree(object_paths, name_owner):
+        """Prefetches the proxies of the given devices and of their profiles.
+        This takes two batches of round trips regardless of the number of
+        objects, see _RatbagdDBus._prefetch_proxies(). The resolutions,
+        buttons and LEDs are loaded per profile when first needed.
+
+        @param object_paths The object paths of the devices, as [str]
+        @param name_owner The unique bus name of ratbagd, as str
+
+        @returns A dict mapping object paths to Gio.DBusProxy objects
+        """
+        proxies = _RatbagdDBus._prefetch_proxies(
+            [("Device", path) for path in object_paths], name_owner
+        )
+        profile_paths = []
+        for path in object_paths:
+            if path not in proxies:
+                continue
+            value = proxies[path].get_cached_property("Profiles")
+            profile_paths += value.unpack() if value is not None else []
+        proxies.update(
+            _RatbagdDBus._prefetch_proxies(
+                [("Profile", path) for path in profile_paths], name_owner
+            )
+        )
+        return proxies
+
+    def load_profiles_in_idle(self):
+        """Loads the resolutions, buttons and LEDs of the profiles that have
+        not been accessed yet, one profile per main loop idle callback."""
+        if self._idle_load_id == 0:
+            self._idle_load_id = GLib.idle_add(
+                self._on_idle_load_profile, priority=GLib.PRIORITY_LOW
+            )
+
+    def _on_idle_load_profile(self):
+        for profile in self._profiles:
+            if not profile.is_loaded:
+                try:
+                    profile._load_children()
+                except (RatbagdUnavailableError, GLib.Error) as e:
+                    # Most likely the device is gone and its removal is on
+                    # the way. Accessing the profile tries again.
+                    print(
+                        f"Cannot load profile {profile._object_path}: {e}",
+                        file=sys.stderr,
+                    )
+                    break
+                return GLib.SOURCE_CONTINUE
+        self._idle_load_id = 0
+        return GLib.SOURCE_REMOVE
+
+    def _release(self):
+        # Also stops loading the profiles and releases them.
+        if self._idle_load_id != 0:
+            GLib.source_remove(self._idle_load_id)
+            self._idle_load_id = 0
+        super()._release()
+        for profile in self._profiles:
+            profile._release()
+
     def _on_signal_received(self, proxy, sender_name, signal_name, parameters):
         if signal_name == "Resync":
+            self._invalidate_static_properties()
+            for profile in self._profiles:
+                profile._invalidate_static_properties()
             self.emit("resync")
 
     def _on_active_profile_changed(self, profile, pspec):
@@ -423,8 +1212,81 @@ class RatbagdDevice(_RatbagdDBus):
         this method and always succeed.  Any failure is handled inside ratbagd
         by emitting the Resync signal, which automatically resynchronizes the
         device. No further interaction is required by the client.
+
+        Any property writes still held back for coalescing are sent first.
+        The call doesn't block the main loop, its errors are printed.
+        """
+        self._dbus_call_async("Commit", "")
+
+    @contextmanager
+    def transaction(self):
+        """Groups changes to this device, its profiles and their resolutions,
+        buttons and LEDs::
+
+            with device.transaction():
+                for profile in device.profiles:
+                    profile.buttons[0].mapping = 2
+
+        Property writes inside the block are only queued, and all of them are
+        sent at once when the block is left. Change notifications of the
+        device, its profiles and every object written to are held back until
+        ratbagd has replied to all writes, so each property is notified once
+        and each profile's dirty flag changes at most once.
+
+        If the block raises, the writes made in it are dropped without
+        invoking their callbacks, and the local copies of the properties are
+        restored.
+
+        Nested transactions are part of the outermost one.
         """
-        self._dbus_call("Commit", "")
+        if _RatbagdDBus._transaction_objects is not None:
+            yield
+            return
+
+        objects = {self._object_path: self}
+        for profile in self._profiles:
+            objects[profile._object_path] = profile
+        for obj in objects.values():
+            obj.freeze_notify()
+        # The writes queued before the block, with their callbacks as of now.
+        queued = {
+            key: (obj, val, old, list(callbacks))
+            for key, (obj, val, old, callbacks) in (
+                _RatbagdDBus._pending_writes.items()
+            )
+        }
+        _RatbagdDBus._transaction_objects = objects
+        try:
+            yield
+        except BaseException:
+            _RatbagdDBus._transaction_objects = None
+            self._drop_transaction_writes(queued)
+            for obj in objects.values():
+                obj.thaw_notify()
+            raise
+
+        _RatbagdDBus._transaction_objects = None
+
+        def on_flushed():
+            for obj in objects.values():
+                obj.thaw_notify()
+
+        _RatbagdDBus._flush_pending_writes(on_flushed)
+
+    @staticmethod
+    def _drop_transaction_writes(queued):
+        # Drops the writes queued by a failed transaction, putting back those
+        # that were already queued before it, and restores the local copies
+        # of their properties.
+        pending = _RatbagdDBus._pending_writes
+        for key in list(pending):
+            obj, _val, old, _callbacks = pending.pop(key)
+            if key in queued:
+                pending[key] = queued[key]
+                old = queued[key][1]
+            _path, property = key
+            obj._proxy.set_cached_property(property, old)
+            obj._on_cached_property_changed(property)
 
 
 class RatbagdProfile(_RatbagdDBus):
@@ -435,8 +1297,19 @@ class RatbagdProfile(_RatbagdDBus):
     CAP_DISABLE = 102
     CAP_WRITE_ONLY = 103
 
-    def __init__(self, object_path):
-        super().__init__("Profile", object_path)
+    _cached_properties = {
+        "AngleSnapping": ("_angle_snapping", "angle-snapping"),
+        "Debounce": ("_debounce", "debounce"),
+        "Disabled": ("_disabled", "disabled"),
+        "IsActive": ("_active", "is-active"),
+        "IsDirty": ("_dirty", "dirty"),
+        "ReportRate": ("_report_rate", "report-rate"),
+    }
+
+    _notified_properties = {"Name": "name"}
+
+    def __init__(self, object_path, proxies=None):
+        super().__init__("Profile", object_path, proxies)
         self._active = self._get_dbus_property("IsActive")
         self._angle_snapping = self._get_dbus_property("AngleSnapping")
         self._debounce = self._get_dbus_property("Debounce")
@@ -444,20 +1317,80 @@ class RatbagdProfile(_RatbagdDBus):
         self._disabled = self._get_dbus_property("Disabled")
         self._report_rate = self._get_dbus_property("ReportRate")
 
+        # The resolutions, buttons and LEDs are only built on first access,
+        # see _load_children().
+        self._resolutions: Optional[List[RatbagdResolution]] = None
+        self._buttons: Optional[List[RatbagdButton]] = None
+        self._leds: Optional[List[RatbagdLed]] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        """True if the resolutions, buttons and LEDs have been built."""
+        return self._resolutions is not None
+
+    def _load_children(self):
+        # Builds the resolutions, buttons and LEDs of this profile, loading
+        # all of them in one batch, see _RatbagdDBus._prefetch_proxies().
+        # Raises RatbagdUnavailableError or GLib.Error if they cannot be
+        # loaded, e.g. because the device was unplugged.
+        if self.is_loaded:
+            return
+
         # FIXME: if we start adding and removing objects from any of these
         # lists, things will break!
-        result = self._get_dbus_property("Resolutions") or []
-        self._resolutions = [RatbagdResolution(objpath) for objpath in result]
+        resolutions = self._get_dbus_property("Resolutions") or []
+        buttons = self._get_dbus_property("Buttons") or []
+        leds = self._get_dbus_property("Leds") or []
+        proxies = _RatbagdDBus._prefetch_proxies(
+            [("Resolution", objpath) for objpath in resolutions]
+            + [("Button", objpath) for objpath in buttons]
+            + [("Led", objpath) for objpath in leds],
+            self._proxy.get_name_owner(),
+        )
+
+        # Only store them once all of them were built.
+        new_resolutions = [
+            RatbagdResolution(objpath, proxies) for objpath in resolutions
+        ]
+        new_buttons = [RatbagdButton(objpath, proxies) for objpath in buttons]
+        new_leds = [RatbagdLed(objpath, proxies) for objpath in leds]
+
+        self._resolutions = new_resolutions
         self._subscribe_dirty(self._resolutions)
 
-        result = self._get_dbus_property("Buttons") or []
-        self._buttons = [RatbagdButton(objpath) for objpath in result]
+        self._buttons = new_buttons
         self._subscribe_dirty(self._buttons)
 
-        result = self._get_dbus_property("Leds") or []
-        self._leds = [RatbagdLed(objpath) for objpath in result]
+        self._leds = new_leds
         self._subscribe_dirty(self._leds)
 
+    def _ensure_children(self):
+        # Loads the children for the properties below. Those are read from
+        # widget handlers, so errors are printed and leave the profile without
+        # children instead of raising, e.g. when the device was unplugged
+        # while they were loading.
+        if self.is_loaded:
+            return
+        try:
+            self._load_children()
+        except (RatbagdUnavailableError, GLib.Error) as e:
+            print(f"Cannot load profile {self._object_path}: {e}", file=sys.stderr)
+            self._resolutions = []
+            self._buttons = []
+            self._leds = []
+
+    def _release(self):
+        super()._release()
+        if self.is_loaded:
+            for obj in self._resolutions + self._buttons + self._leds:
+                obj._release()
+
+    def _invalidate_static_properties(self):
+        super()._invalidate_static_properties()
+        if self.is_loaded:
+            for obj in self._resolutions + self._buttons + self._leds:
+                obj._invalidate_static_properties()
+
     def _subscribe_dirty(self, objects: List[GObject.GObject]):
         for obj in objects:
             obj.connect("notify", self._on_obj_notify)
@@ -467,76 +1400,15 @@ class RatbagdProfile(_RatbagdDBus):
             self._dirty = True
             self.notify("dirty")
 
-    def _on_properties_changed(self, proxy, changed_props, invalidated_props):
-        try:
-            angle_snapping = changed_props["AngleSnapping"]
-        except KeyError:
-            # Different property changed, skip.
-            pass
-        else:
-            if angle_snapping != self._angle_snapping:
-                self._angle_snapping = angle_snapping
-                self.notify("angle-snapping")
-
-        try:
-            debounce = changed_props["Debounce"]
-        except KeyError:
-            # Different property changed, skip.
-            pass
-        else:
-            if debounce != self._debounce:
-                self._debounce = debounce
-                self.notify("debounce")
-
-        try:
-            disabled = changed_props["Disabled"]
-        except KeyError:
-            # Different property changed, skip.
-            pass
-        else:
-            if disabled != self._disabled:
-                self._disabled = disabled
-                self.notify("disabled")
-
-        try:
-            active = changed_props["IsActive"]
-        except KeyError:
-            # Different property changed, skip.
-            pass
-        else:
-            if active != self._active:
-                self._active = active
-                self.notify("is-active")
-
-        try:
-            dirty = changed_props["IsDirty"]
-        except KeyError:
-            # Different property changed, skip.
-            pass
-        else:
-            if dirty != self._dirty:
-                self._dirty = dirty
-                self.notify("dirty")
-
-        try:
-            report_rate = changed_props["ReportRate"]
-        except KeyError:
-            # Different property changed, skip.
-            pass
-        else:
-            if report_rate != self._report_rate:
-                self._report_rate = report_rate
-                self.notify("report-rate")
-
     @GObject.Property
     def capabilities(self):
-        """The capabilities of this profile as an array. Capabilities not
-        present on the profile are not in the list. Thus use e.g.
+        """The capabilities of this profile as a frozenset. Capabilities not
+        present on the profile are not in the set. Thus use e.g.
 
         if RatbagdProfile.CAP_WRITABLE_NAME in profile.capabilities:
             do something
         """
-        return self._get_dbus_property("Capabilities") or []
+        return self._get_static_dbus_property("Capabilities", frozenset)
 
     @GObject.Property
     def name(self):
@@ -548,12 +1420,12 @@ class RatbagdProfile(_RatbagdDBus):
         """Set the name of this profile.
 
         @param name The new name, as str"""
-        self._set_dbus_property("Name", "s", name)
+        self._set_dbus_property_async("Name", "s", name)
 
     @GObject.Property
     def index(self):
         """The index of this profile."""
-        return self._get_dbus_property("Index")
+        return self._get_static_dbus_property("Index")
 
     @GObject.Property
     def dirty(self):
@@ -570,7 +1442,7 @@ class RatbagdProfile(_RatbagdDBus):
         """Enable/Disable this profile.
 
         @param disabled The new state, as boolean"""
-        self._set_dbus_property("Disabled", "b", disabled)
+        self._set_dbus_property_async("Disabled", "b", disabled)
 
     @GObject.Property
     def report_rate(self) -> int:
@@ -583,12 +1455,12 @@ class RatbagdProfile(_RatbagdDBus):
 
         @param rate The new report rate, as int
         """
-        self._set_dbus_property("ReportRate", "u", rate)
+        self._set_dbus_property_async("ReportRate", "u", rate)
 
     @GObject.Property
     def report_rates(self):
-        """The list of supported report rates"""
-        return self._get_dbus_property("ReportRates") or []
+        """The tuple of supported report rates"""
+        return self._get_static_dbus_property("ReportRates", tuple)
 
     @GObject.Property
     def angle_snapping(self):
@@ -601,7 +1473,7 @@ class RatbagdProfile(_RatbagdDBus):
 
         @param value The angle snapping option as int
         """
-        self._set_dbus_property("AngleSnapping", "i", value)
+        self._set_dbus_property_async("AngleSnapping", "i", value)
 
     @GObject.Property
     def debounce(self):
@@ -614,18 +1486,19 @@ class RatbagdProfile(_RatbagdDBus):
 
         @param value The button debounce time, as int
         """
-        self._set_dbus_property("Debounce", "i", value)
+        self._set_dbus_property_async("Debounce", "i", value)
 
     @GObject.Property
     def debounces(self):
-        """The list of supported debounce times"""
-        return self._get_dbus_property("Debounces") or []
+        """The tuple of supported debounce times"""
+        return self._get_static_dbus_property("Debounces", tuple)
 
     @GObject.Property
     def resolutions(self):
         """A list of RatbagdResolution objects with this profile's resolutions.
         Note that the list of resolutions differs between profiles but the number
         of resolutions is identical across profiles."""
+        self._ensure_children()
         return self._resolutions
 
     @GObject.Property
@@ -634,7 +1507,7 @@ class RatbagdProfile(_RatbagdDBus):
         property computed over the cached list of resolutions. In the unlikely
         case that your device driver is misconfigured and there is no active
         resolution, this returns `None`."""
-        for resolution in self._resolutions:
+        for resolution in self.resolutions:
             if resolution.is_active:
                 return resolution
         print(
@@ -648,6 +1521,7 @@ class RatbagdProfile(_RatbagdDBus):
         """A list of RatbagdButton objects with this profile's button mappings.
         Note that the list of buttons differs between profiles but the number
         of buttons is identical across profiles."""
+        self._ensure_children()
         return self._buttons
 
     @GObject.Property
@@ -655,6 +1529,7 @@ class RatbagdProfile(_RatbagdDBus):
         """A list of RatbagdLed objects with this profile's leds. Note that the
         list of leds differs between profiles but the number of leds is
         identical across profiles."""
+        self._ensure_children()
         return self._leds
 
     @GObject.Property
@@ -662,11 +1537,15 @@ class RatbagdProfile(_RatbagdDBus):
         """Returns True if the profile is currently active, false otherwise."""
         return self._active
 
-    def set_active(self):
-        """Set this profile to be the active profile."""
-        ret = self._dbus_call("SetActive", "")
-        self._set_dbus_property("IsActive", "b", True, readwrite=False)
-        return ret
+    def set_active(self, callback=None):
+        """Set this profile to be the active profile, without blocking the
+        main loop.
+
+        @param callback Invoked from the main loop with (result, error) once
+                        ratbagd replied, error being None on success. Errors
+                        are printed without a callback.
+        """
+        self._dbus_call_and_set_async("SetActive", "IsActive", callback)
 
 
 class RatbagdResolution(_RatbagdDBus):
@@ -675,8 +1554,15 @@ class RatbagdResolution(_RatbagdDBus):
     CAP_SEPARATE_XY_RESOLUTION = 1
     CAP_DISABLE = 2
 
-    def __init__(self, object_path):
-        super().__init__("Resolution", object_path)
+    _cached_properties = {
+        "Resolution": ("_resolution", "resolution"),
+        "IsActive": ("_active", "is-active"),
+        "IsDefault": ("_default", "is-default"),
+        "IsDisabled": ("_disabled", "is-disabled"),
+    }
+
+    def __init__(self, object_path, proxies=None):
+        super().__init__("Resolution", object_path, proxies)
         self._active = self._get_dbus_property("IsActive")
         self._default = self._get_dbus_property("IsDefault")
         self._disabled = self._get_dbus_property("IsDisabled")
@@ -684,61 +1570,25 @@ class RatbagdResolution(_RatbagdDBus):
             self._get_dbus_property_nonnull("Resolution")
         )
 
-    def _on_properties_changed(self, proxy, changed_props, invalidated_props):
-        try:
-            resolution = self._convert_resolution_from_dbus(changed_props["Resolution"])
-        except KeyError:
-            # Different property changed, skip.
-            pass
-        else:
-            if resolution != self._resolution:
-                self._resolution = resolution
-                self.notify("resolution")
-
-        try:
-            active = changed_props["IsActive"]
-        except KeyError:
-            # Different property changed, skip.
-            pass
-        else:
-            if active != self._active:
-                self._active = active
-                self.notify("is-active")
-
-        try:
-            default = changed_props["IsDefault"]
-        except KeyError:
-            # Different property changed, skip.
-            pass
-        else:
-            if default != self._default:
-                self._default = default
-                self.notify("is-default")
-
-        try:
-            disabled = changed_props["IsDisabled"]
-        except KeyError:
-            # Different property changed, skip.
-            pass
-        else:
-            if disabled != self._disabled:
-                self._disabled = disabled
-                self.notify("is-disabled")
+    def _convert_dbus_property(self, name, value):
+        if name == "Resolution":
+            return self._convert_resolution_from_dbus(value)
+        return value
 
     @GObject.Property
     def capabilities(self):
-        """The capabilities of this resolution as an array. Capabilities not
-        present on the resolution are not in the list. Thus use e.g.
+        """The capabilities of this resolution as a frozenset. Capabilities
+        not present on the resolution are not in the set. Thus use e.g.
 
         if resolution.CAP_DISABLE in resolution.capabilities:
             do something
         """
-        return self._get_dbus_property("Capabilities") or []
+        return self._get_static_dbus_property("Capabilities", frozenset)
 
     @GObject.Property
     def index(self):
         """The index of this resolution."""
-        return self._get_dbus_property("Index")
+        return self._get_static_dbus_property("Index")
 
     @staticmethod
     def _convert_resolution_from_dbus(
@@ -771,12 +1621,12 @@ class RatbagdResolution(_RatbagdDBus):
             variant = GLib.Variant("u", resolution[0])
         else:
             variant = GLib.Variant("(uu)", resolution)
-        self._set_dbus_property("Resolution", "v", variant)
+        self._set_dbus_property_async("Resolution", "v", variant)
 
     @GObject.Property
     def resolutions(self):
-        """The list of supported DPI values"""
-        return self._get_dbus_property("Resolutions") or []
+        """The tuple of supported DPI values"""
+        return self._get_static_dbus_property("Resolutions", tuple)
 
     @GObject.Property
     def is_active(self):
@@ -795,21 +1645,19 @@ class RatbagdResolution(_RatbagdDBus):
         """True if this is currently disabled, False otherwise"""
         return self._disabled
 
-    def set_active(self):
-        """Set this resolution to be the active one."""
-        ret = self._dbus_call("SetActive", "")
-        self._set_dbus_property("IsActive", "b", True, readwrite=False)
-        return ret
+    def set_active(self, callback=None):
+        """Set this resolution to be the active one, without blocking the
+        main loop. See RatbagdProfile.set_active for the callback."""
+        self._dbus_call_and_set_async("SetActive", "IsActive", callback)
 
-    def set_default(self):
-        """Set this resolution to be the default."""
-        ret = self._dbus_call("SetDefault", "")
-        self._set_dbus_property("IsDefault", "b", True, readwrite=False)
-        return ret
+    def set_default(self, callback=None):
+        """Set this resolution to be the default, without blocking the main
+        loop. See RatbagdProfile.set_active for the callback."""
+        self._dbus_call_and_set_async("SetDefault", "IsDefault", callback)
 
     def set_disabled(self, disable):
         """Set this resolution to be disabled."""
-        return self._set_dbus_property("IsDisabled", "b", disable)
+        self._set_dbus_property_async("IsDisabled", "b", disable)
 
 
 class RatbagdButton(_RatbagdDBus):
@@ -884,20 +1732,33 @@ class RatbagdButton(_RatbagdDBus):
         ActionSpecial.BATTERY_LEVEL: N_("Battery Level"),
     }
 
-    def __init__(self, object_path):
-        super().__init__("Button", object_path)
+    # The mapping, macro, special and key properties are decoded from
+    # Mapping as well, action-type is the one widgets follow.
+    _notified_properties = {"Mapping": "action-type"}
 
-    def _on_properties_changed(self, proxy, changed_props, invalidated_props):
-        if "Mapping" in changed_props.keys():
-            self.notify("action-type")
+    def __init__(self, object_path, proxies=None):
+        super().__init__("Button", object_path, proxies)
+
+        # The Mapping property decoded into (action type, value) and the
+        # macro parsed from it, built on first use, see _mapping().
+        self._decoded_mapping: Optional[Tuple[int, object]] = None
+        self._decoded_macro: Optional[RatbagdMacro] = None
+
+    def _on_cached_property_changed(self, property):
+        super()._on_cached_property_changed(property)
+        if property == "Mapping":
+            self._decoded_mapping = None
+            self._decoded_macro = None
 
     def _mapping(self):
-        return self._get_dbus_property("Mapping")
+        if self._decoded_mapping is None:
+            self._decoded_mapping = self._get_dbus_property("Mapping")
+        return self._decoded_mapping
 
     @GObject.Property
     def index(self):
         """The index of this button."""
-        return self._get_dbus_property("Index")
+        return self._get_static_dbus_property("Index")
 
     @GObject.Property
     def mapping(self):
@@ -915,18 +1776,21 @@ class RatbagdButton(_RatbagdDBus):
         @param button The button to map to, as int
         """
         button = GLib.Variant("u", button)
-        self._set_dbus_property(
+        self._set_dbus_property_async(
             "Mapping", "(uv)", (RatbagdButton.ActionType.BUTTON, button)
         )
 
     @GObject.Property
     def macro(self):
         """A RatbagdMacro object representing the currently set macro or
-        None otherwise."""
+        None otherwise. The object is shared by all callers until the mapping
+        changes, so don't modify it."""
         type, macro = self._mapping()
         if type != RatbagdButton.ActionType.MACRO:
             return None
-        return RatbagdMacro.from_ratbag(macro)
+        if self._decoded_macro is None:
+            self._decoded_macro = RatbagdMacro.from_ratbag(macro)
+        return self._decoded_macro
 
     @macro.setter
     def macro(self, macro):
@@ -937,7 +1801,7 @@ class RatbagdButton(_RatbagdDBus):
                      the button, as RatbagdMacro.
         """
         macro = GLib.Variant("a(uu)", macro.keys)
-        self._set_dbus_property(
+        self._set_dbus_property_async(
             "Mapping", "(uv)", (RatbagdButton.ActionType.MACRO, macro)
         )
 
@@ -957,7 +1821,7 @@ class RatbagdButton(_RatbagdDBus):
         @param special The special entry, as one of RatbagdButton.ActionSpecial
         """
         special = GLib.Variant("u", special)
-        self._set_dbus_property(
+        self._set_dbus_property_async(
             "Mapping", "(uv)", (RatbagdButton.ActionType.SPECIAL, special)
         )
 
@@ -971,7 +1835,9 @@ class RatbagdButton(_RatbagdDBus):
     @key.setter
     def key(self, key):
         key = GLib.Variant("u", key)
-        self._set_dbus_property("Mapping", "(uv)", (RatbagdButton.ActionType.KEY, key))
+        self._set_dbus_property_async(
+            "Mapping", "(uv)", (RatbagdButton.ActionType.KEY, key)
+        )
 
     @GObject.Property
     def action_type(self):
@@ -985,8 +1851,8 @@ class RatbagdButton(_RatbagdDBus):
 
     @GObject.Property
     def action_types(self):
-        """An array of possible values for ActionType."""
-        return self._get_dbus_property("ActionTypes")
+        """A frozenset of possible values for ActionType."""
+        return self._get_static_dbus_property("ActionTypes", frozenset)
 
     @GObject.Property
     def disabled(self):
@@ -996,7 +1862,7 @@ class RatbagdButton(_RatbagdDBus):
     def disable(self):
         """Disables this button."""
         zero = GLib.Variant("u", 0)
-        self._set_dbus_property(
+        self._set_dbus_property_async(
             "Mapping", "(uv)", (RatbagdButton.ActionType.NONE, zero)
         )
 
@@ -1113,8 +1979,15 @@ class RatbagdLed(_RatbagdDBus):
         Mode.BREATHING: N_("Breathing"),
     }
 
-    def __init__(self, object_path):
-        super().__init__("Led", object_path)
+    _cached_properties = {
+        "Brightness": ("_brightness", "brightness"),
+        "Color": ("_color", "color"),
+        "EffectDuration": ("_effect_duration", "effect-duration"),
+        "Mode": ("_mode", "mode"),
+    }
+
+    def __init__(self, object_path, proxies=None):
+        super().__init__("Led", object_path, proxies)
 
         self._brightness = self._get_dbus_property("Brightness")
         self._color = self._get_dbus_property("Color")
@@ -1124,7 +1997,7 @@ class RatbagdLed(_RatbagdDBus):
     @GObject.Property
     def index(self):
         """The index of this led."""
-        return self._get_dbus_property("Index")
+        return self._get_static_dbus_property("Index")
 
     @GObject.Property
     def mode(self):
@@ -1139,12 +2012,12 @@ class RatbagdLed(_RatbagdDBus):
         @param mode The new mode, as one of Mode.OFF, Mode.ON, Mode.CYCLE and
                     Mode.BREATHING.
         """
-        self._set_dbus_property("Mode", "u", mode)
+        self._set_dbus_property_async("Mode", "u", mode)
 
     @GObject.Property
     def modes(self):
-        """The supported modes as a list"""
-        return self._get_dbus_property("Modes")
+        """The supported modes as a frozenset"""
+        return self._get_static_dbus_property("Modes", frozenset)
 
     @GObject.Property
     def color(self):
@@ -1157,7 +2030,7 @@ class RatbagdLed(_RatbagdDBus):
 
         @param color An RGB color, as an integer triplet with values 0-255.
         """
-        self._set_dbus_property("Color", "(uuu)", color)
+        self._set_dbus_property_async("Color", "(uuu)", color)
 
     @GObject.Property
     def colordepth(self):
@@ -1176,7 +2049,7 @@ class RatbagdLed(_RatbagdDBus):
 
         @param effect_duration The new effect duration, as int
         """
-        self._set_dbus_property("EffectDuration", "u", effect_duration)
+        self._set_dbus_property_async("EffectDuration", "u", effect_duration)
 
     @GObject.Property
     def brightness(self):
@@ -1189,45 +2062,4 @@ class RatbagdLed(_RatbagdDBus):
 
         @param brightness The new brightness, as int
         """
-        self._set_dbus_property("Brightness", "u", brightness)
-
-    def _on_properties_changed(self, proxy, changed_props, invalidated_props):
-        try:
-            brightness = changed_props["Brightness"]
-        except KeyError:
-            # Different property changed, skip.
-            pass
-        else:
-            if brightness != self._brightness:
-                self._brightness = brightness
-                self.notify("brightness")
-
-        try:
-            color = changed_props["Color"]
-        except KeyError:
-            # Different property changed, skip.
-            pass
-        else:
-            if color != self._color:
-                self._color = color
-                self.notify("color")
-
-        try:
-            effect_duration = changed_props["EffectDuration"]
-        except KeyError:
-            # Different property changed, skip.
-            pass
-        else:
-            if effect_duration != self._effect_duration:
-                self._effect_duration = effect_duration
-                self.notify("effect-duration")
-
-        try:
-            mode = changed_props["Mode"]
-        except KeyError:
-            # Different property changed, skip.
-            pass
-        else:
-            if mode != self._mode:
-                self._mode = mode
-                self.notify("mode")
+        self._set_dbus_property_async("Brightness", "u", brightness)
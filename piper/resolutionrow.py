@@ -5,7 +5,7 @@ from typing import Optional
 import gi
 
 from .ratbagd import RatbagdResolution
-from .util.gobject import connect_signal_with_weak_ref
+from .util.gobject import WeakSignalGroup
 
 gi.require_version("Gtk", "3.0")
 from gi.repository import GObject, Gdk, Gtk  # noqa
@@ -63,30 +63,41 @@ class ResolutionRow(Gtk.ListBoxRow):
         Gtk.ListBoxRow.__init__(self, *args, **kwargs)
 
         self.resolutions_page = resolutions_page
-        self._resolution = resolution
-        self.resolutions = resolution.resolutions
         self._scale_handler = self.scale.connect(
             "value-changed", self._on_scale_value_changed
         )
         self._disabled_button_handler = self.disable_button.connect(
             "toggled", self._on_disable_button_toggled
         )
+        self._resolution_signals = WeakSignalGroup(self)
+        self.set_resolution(resolution)
 
-        self._active_handler = connect_signal_with_weak_ref(
-            self, resolution, "notify::is-active", self._on_status_changed
+    def set_resolution(self, resolution: RatbagdResolution) -> None:
+        """Binds this row to the given resolution, e.g. the one at the same
+        index of another profile.
+
+        @param resolution The resolution to configure, as
+                          ratbagd.RatbagdResolution
+        """
+        self._resolution_signals.disconnect_all()
+        self._resolution = resolution
+        self.resolutions = resolution.resolutions
+
+        self._active_handler = self._resolution_signals.connect(
+            resolution, "notify::is-active", self._on_status_changed
         )
-        self._disabled_handler = connect_signal_with_weak_ref(
-            self, resolution, "notify::is-disabled", self._on_status_changed
+        self._disabled_handler = self._resolution_signals.connect(
+            resolution, "notify::is-disabled", self._on_status_changed
         )
-        connect_signal_with_weak_ref(
-            self, resolution, "notify::resolution", self._on_profile_resolution_changed
+        self._resolution_signals.connect(
+            resolution, "notify::resolution", self._on_profile_resolution_changed
         )
 
         # Get resolution capabilities and update internal values.
-        if RatbagdResolution.CAP_SEPARATE_XY_RESOLUTION in resolution.capabilities:
-            self.CAP_SEPARATE_XY_RESOLUTION = True
-        if RatbagdResolution.CAP_DISABLE in resolution.capabilities:
-            self.CAP_DISABLE = True
+        self.CAP_SEPARATE_XY_RESOLUTION = (
+            RatbagdResolution.CAP_SEPARATE_XY_RESOLUTION in resolution.capabilities
+        )
+        self.CAP_DISABLE = RatbagdResolution.CAP_DISABLE in resolution.capabilities
 
         # Set initial values for the UI.
         res = resolution.resolution[0]
@@ -101,9 +112,8 @@ class ResolutionRow(Gtk.ListBoxRow):
         with self.scale.handler_block(self._scale_handler):
             self.scale.props.adjustment.configure(res, minres, maxres, 50, 50, 0)
             self.scale.set_value(res)
-        if resolution.is_disabled:
-            with self.disable_button.handler_block(self._disabled_button_handler):
-                self.disable_button.set_active(True)
+        with self.disable_button.handler_block(self._disabled_button_handler):
+            self.disable_button.set_active(resolution.is_disabled)
         self._on_status_changed(resolution, _pspec=None)
 
     @Gtk.Template.Callback("_on_change_value")
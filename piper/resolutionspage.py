@@ -1,7 +1,7 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
 from gettext import gettext as _
-from typing import Optional
+from typing import List, Optional
 
 from .mousemap import MouseMap
 from .ratbagd import RatbagdButton, RatbagdDevice, RatbagdProfile
@@ -44,12 +44,25 @@ class ResolutionsPage(Gtk.Box):
 
         self._device = ratbagd_device
         self._last_activated_row: Optional[ResolutionRow] = None
-        self._profile = profile
+        self._rows: List[ResolutionRow] = []
 
-        mousemap = MouseMap("#Buttons", self._device, spacing=20, border_width=20)
-        self.pack_start(mousemap, True, True, 0)
+        self._mousemap = MouseMap("#Buttons", self._device, spacing=20, border_width=20)
+        self.pack_start(self._mousemap, True, True, 0)
         # Place the MouseMap on the left
-        self.reorder_child(mousemap, 0)
+        self.reorder_child(self._mousemap, 0)
+
+        self.listbox.foreach(Gtk.Widget.destroy)
+        self.set_profile(profile)
+
+    def set_profile(self, profile: RatbagdProfile) -> None:
+        """Binds this page to the given profile, reusing the resolution rows.
+
+        @param profile The profile to configure, as ratbagd.RatbagdProfile
+        """
+        self._profile = profile
+
+        for label in self._mousemap.get_children():
+            label.destroy()
         for button in profile.buttons:
             if (
                 button.action_type == RatbagdButton.ActionType.SPECIAL
@@ -58,13 +71,21 @@ class ResolutionsPage(Gtk.Box):
                 label = Gtk.Label(
                     label=_(RatbagdButton.SPECIAL_DESCRIPTION[button.special])
                 )
-                mousemap.add(label, f"#button{button.index}")
-        mousemap.show_all()
-
-        self.listbox.foreach(Gtk.Widget.destroy)
-        for resolution in profile.resolutions:
+                self._mousemap.add(label, f"#button{button.index}")
+        self._mousemap.show_all()
+
+        resolutions = profile.resolutions
+        for row, resolution in zip(self._rows, resolutions):
+            row.set_resolution(resolution)
+        for row in self._rows[len(resolutions) :]:
+            if row is self._last_activated_row:
+                self._last_activated_row = None
+            row.destroy()
+        for resolution in resolutions[len(self._rows) :]:
             row = ResolutionRow(resolution, self)
             self.listbox.insert(row, resolution.index)
+            self._rows.append(row)
+        del self._rows[len(resolutions) :]
 
     @Gtk.Template.Callback("on_row_activated")
     def on_row_activated(self, _listbox: Gtk.ListBox, row: ResolutionRow) -> None:
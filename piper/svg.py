@@ -1,12 +1,48 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
-from typing import Optional
-from gi.repository import Gio  # noqa
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional
 
 import configparser
+import json
+import re
 
+import gi
+
+from .util import trace
+
+if TYPE_CHECKING:
+    from lxml import etree
+
+gi.require_version("Rsvg", "2.0")
+from gi.repository import Gio, GLib, Rsvg  # noqa
+
+# Selects the elements with an identifier, compiled on first use by
+# _get_elements_with_id() so lxml isn't imported on startup.
+_elements_with_id: Optional["etree.XPath"] = None
+
+
+def _get_elements_with_id() -> "etree.XPath":
+    global _elements_with_id
+
+    if _elements_with_id is None:
+        from lxml import etree
+
+        _elements_with_id = etree.XPath("//*[@id]")
+    return _elements_with_id
+
+
+# Maps every DeviceMatch entry of svg-lookup.ini to its SVG filename, built on
+# first use by _get_svg_index().
+_svg_index: Optional[Dict[str, str]] = None
+
+
+def _get_svg_index() -> Dict[str, str]:
+    global _svg_index
+
+    if _svg_index is not None:
+        return _svg_index
 
-def get_svg(model: str) -> Optional[bytes]:
     resource = Gio.resources_lookup_data(
         "/org/freedesktop/Piper/svgs/svg-lookup.ini", Gio.ResourceLookupFlags.NONE
     )
@@ -17,6 +53,20 @@ def get_svg(model: str) -> Optional[bytes]:
     config.read_string(data.decode("utf-8"), source="svg-lookup.ini")
     assert config.sections()
 
+    # Only publish the index once it is complete, the thumbnail threads may
+    # look devices up concurrently. At worst they build it more than once.
+    svg_index: Dict[str, str] = {}
+    for s in config.sections():
+        filename = config[s]["Svg"]
+        for match in config[s]["DeviceMatch"].split(";"):
+            # If a match is listed twice, the first section wins.
+            svg_index.setdefault(match, filename)
+    _svg_index = svg_index
+    return svg_index
+
+
+def get_svg_filename(model: str) -> str:
+    """Returns the filename of the SVG to show for the given device model."""
     filename = "fallback.svg"
 
     if model.startswith(("usb:", "bluetooth:")):
@@ -24,15 +74,184 @@ def get_svg(model: str) -> Optional[bytes]:
         # Where the version is 0 (virtually all devices) we drop it. This
         # way the DeviceMatch lines are less confusing.
         usbid = ":".join([bus, vid, pid]) if int(version) == 0 else model
+        filename = _get_svg_index().get(usbid, filename)
 
-        for s in config.sections():
-            matches = config[s]["DeviceMatch"].split(";")
-            if usbid in matches:
-                filename = config[s]["Svg"]
-                break
+    return filename
 
+
+def get_svg(model: str) -> Optional[bytes]:
     resource = Gio.resources_lookup_data(
-        f"/org/freedesktop/Piper/svgs/{filename}", Gio.ResourceLookupFlags.NONE
+        f"/org/freedesktop/Piper/svgs/{get_svg_filename(model)}",
+        Gio.ResourceLookupFlags.NONE,
     )
 
     return resource.get_data()
+
+
+def _get_svg_index_data(filename: str) -> Optional[Dict[str, List[str]]]:
+    # The index written next to the SVG by data/minify-svgs.py at build time,
+    # None if there is none.
+    stem = filename.rsplit(".", 1)[0]
+    try:
+        resource = Gio.resources_lookup_data(
+            f"/org/freedesktop/Piper/svgs/{stem}.json", Gio.ResourceLookupFlags.NONE
+        )
+    except GLib.Error:
+        return None
+    data = resource.get_data()
+    assert data is not None
+    return json.loads(data)
+
+
+class SvgRect(NamedTuple):
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+class ParsedSvg:
+    """A device SVG, parsed once and shared by every widget that shows it, see
+    `get_parsed_svg`. Users must not close or modify the handle or the tree.
+    """
+
+    # The elements that MouseMap lays out and highlights, see _build_index().
+    _MAPPED_ELEMENT = re.compile(r"(button|led)\d+(-leader|-path)?")
+
+    _SVG_RECT = "{http://www.w3.org/2000/svg}rect"
+
+    @trace.traced
+    def __init__(
+        self, filename: str, data: bytes, index: Optional[Dict[str, List[str]]] = None
+    ) -> None:
+        handle = Rsvg.Handle.new_from_data(data)
+        assert handle is not None
+        self.filename = filename
+        self.handle: Rsvg.Handle = handle
+        self._data = data
+        # The mapped elements and the leaders pointing left, as precomputed by
+        # data/minify-svgs.py. Saves parsing the tree in _build_index().
+        self._index = index
+        self._tree: Optional[etree._Element] = None
+        # The geometry of elements by librsvg identifier, None for those that
+        # cannot be measured, and whether leaders point left, see
+        # _build_index().
+        self._geometry: Optional[Dict[str, Optional[SvgRect]]] = None
+        self._is_left: Dict[str, bool] = {}
+
+    @property
+    def tree(self) -> "etree._Element":
+        """The lxml element tree of the SVG, parsed on first access."""
+        if self._tree is None:
+            # lxml is only needed for SVGs without an index, so don't import it
+            # on startup.
+            from lxml import etree
+
+            self._tree = etree.fromstring(self._data)
+        return self._tree
+
+    def get_geometry(self, svg_id: str) -> Optional[SvgRect]:
+        """Returns the position and size of the element with the given
+        identifier, according to librsvg so e.g. `#button0-leader`, or None if
+        it cannot be measured. The buttons, LEDs and their leaders and paths
+        are all measured on the first call, other elements when asked for.
+        """
+        if self._geometry is None:
+            self._build_index()
+        assert self._geometry is not None
+        if svg_id not in self._geometry:
+            self._geometry[svg_id] = self._measure(svg_id)
+        return self._geometry[svg_id]
+
+    @trace.traced
+    def _build_index(self) -> None:
+        # Measures the mapped elements and finds the side of their leaders,
+        # from the precomputed index if there is one or else in a single pass
+        # over the tree.
+        if self._index is not None:
+            self._geometry = {
+                svg_id: self._measure(svg_id) for svg_id in self._index["elements"]
+            }
+            self._is_left = dict.fromkeys(self._index["left"], True)
+            return
+
+        self._geometry = {}
+        leaders: Dict[str, List[bool]] = {}
+        for element in _get_elements_with_id()(self.tree):
+            element_id = element.get("id")
+            if not self._MAPPED_ELEMENT.fullmatch(element_id):
+                continue
+            svg_id = f"#{element_id}"
+            self._geometry[svg_id] = self._measure(svg_id)
+            if element_id.endswith("-leader") and element.tag == self._SVG_RECT:
+                style = element.get("style", "")
+                leaders.setdefault(svg_id, []).append("text-align:end" in style)
+        # Like librsvg, we expect a single rect per leader identifier.
+        self._is_left = {
+            svg_id: sides.count(True) == 1 for svg_id, sides in leaders.items()
+        }
+
+    def _measure(self, svg_id: str) -> Optional[SvgRect]:
+        ok, svg_pos = self.handle.get_position_sub(svg_id)
+        if not ok:
+            return None
+        ok, svg_dim = self.handle.get_dimensions_sub(svg_id)
+        if not ok:
+            return None
+        return SvgRect(svg_pos.x, svg_pos.y, svg_dim.width, svg_dim.height)
+
+    def is_left(self, svg_leader: str) -> bool:
+        """Returns True if the leader with the given identifier, according to
+        librsvg so e.g. `#button0-leader`, points to the left, i.e. its text is
+        aligned to the end."""
+        if self._geometry is None:
+            self._build_index()
+        return self._is_left.get(svg_leader, False)
+
+
+class SvgCacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    maxsize: int
+    currsize: int
+
+
+# The parsed SVGs by filename, least recently used first.
+_svg_cache: "OrderedDict[str, ParsedSvg]" = OrderedDict()
+_svg_cache_maxsize = 8
+_svg_cache_hits = 0
+_svg_cache_misses = 0
+
+
+def get_parsed_svg(model: str) -> ParsedSvg:
+    """Returns the parsed SVG for the given device model. The most recently
+    used SVGs are kept, so devices and pages showing the same SVG share one
+    Rsvg.Handle and one element tree.
+
+    @raises GLib.Error when the SVG cannot be loaded or parsed.
+    """
+    global _svg_cache_hits, _svg_cache_misses
+
+    filename = get_svg_filename(model)
+    svg = _svg_cache.get(filename)
+    if svg is not None:
+        _svg_cache_hits += 1
+        _svg_cache.move_to_end(filename)
+        return svg
+
+    _svg_cache_misses += 1
+    data = get_svg(model)
+    assert data is not None
+    svg = ParsedSvg(filename, data, _get_svg_index_data(filename))
+    _svg_cache[filename] = svg
+    if len(_svg_cache) > _svg_cache_maxsize:
+        _svg_cache.popitem(last=False)
+    return svg
+
+
+def svg_cache_info() -> SvgCacheInfo:
+    """Returns the statistics of the parsed SVG cache, in the style of
+    functools.lru_cache's cache_info()."""
+    return SvgCacheInfo(
+        _svg_cache_hits, _svg_cache_misses, _svg_cache_maxsize, len(_svg_cache)
+    )
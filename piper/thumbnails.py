@@ -0,0 +1,144 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+from pathlib import Path
+from typing import Optional
+
+from piper.svg import get_svg
+from .util import trace
+
+import cairo
+import hashlib
+import os
+import sys
+import tempfile
+
+import gi
+
+gi.require_version("Rsvg", "2.0")
+from gi.repository import GLib, Rsvg  # noqa
+
+# The size of the device thumbnails, in application pixels.
+THUMBNAIL_SIZE = 50
+
+# Bump whenever the rendering changes, so stale thumbnails aren't loaded.
+_CACHE_VERSION = 1
+# The cache is trimmed to this size, least recently used thumbnails first.
+_CACHE_MAX_BYTES = 4 * 1024 * 1024
+
+
+def _get_cache_dir() -> Path:
+    return Path(GLib.get_user_cache_dir()) / "piper" / "thumbnails"
+
+
+def _get_cache_path(data: bytes, scale: int) -> Path:
+    # Keyed by content rather than filename, so updated SVGs get new
+    # thumbnails.
+    digest = hashlib.sha256(data).hexdigest()
+    size = THUMBNAIL_SIZE * scale
+    return _get_cache_dir() / f"{digest}-{size}x{size}-v{_CACHE_VERSION}.png"
+
+
+def _load_cached(path: Path) -> Optional[cairo.ImageSurface]:
+    try:
+        with open(path, "rb") as f:
+            surface = cairo.ImageSurface.create_from_png(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, cairo.Error) as e:
+        print(f"Discarding unreadable thumbnail {path}: {e}", file=sys.stderr)
+        try:
+            path.unlink()
+        except OSError:
+            pass
+        return None
+    try:
+        # The modification time records the last use, see _evict().
+        os.utime(path)
+    except OSError:
+        pass
+    return surface
+
+
+def _store_cached(path: Path, surface: cairo.ImageSurface) -> None:
+    # Writes to a temporary file that is renamed into place, so neither a
+    # concurrent reader nor a crash can leave a truncated thumbnail behind.
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                surface.write_to_png(f)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    except (OSError, cairo.Error) as e:
+        print(f"Cannot cache thumbnail {path}: {e}", file=sys.stderr)
+        return
+    _evict(path.parent)
+
+
+def _evict(directory: Path) -> None:
+    # Removes the least recently used thumbnails until the cache fits in
+    # _CACHE_MAX_BYTES. Other processes may be evicting at the same time, so
+    # vanishing files are expected.
+    entries = []
+    for path in directory.glob("*.png"):
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+
+    total = sum(size for _mtime, size, _path in entries)
+    for _mtime, size, path in sorted(entries):
+        if total <= _CACHE_MAX_BYTES:
+            break
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Cannot evict thumbnail {path}: {e}", file=sys.stderr)
+            continue
+        total -= size
+
+
+def _render(data: bytes, scale: int) -> Optional[cairo.ImageSurface]:
+    # Rsvg.Handle isn't thread-safe, so this uses its own handle instead of
+    # the one shared through get_parsed_svg().
+    handle = Rsvg.Handle.new_from_data(data)
+    dimensions = handle.get_dimensions()
+
+    size = THUMBNAIL_SIZE * scale
+    surface = cairo.ImageSurface(cairo.FORMAT_ARGB32, size, size)
+    cr = cairo.Context(surface)
+    # Render straight to the thumbnail size rather than rendering the whole
+    # canvas and scaling it down afterwards.
+    cr.scale(size / dimensions.width, size / dimensions.height)
+    if not handle.render_cairo_sub(cr, "#Device"):
+        return None
+    return surface
+
+
+@trace.traced
+def get_thumbnail(model: str, scale: int) -> Optional[cairo.ImageSurface]:
+    """Returns the thumbnail of the given device model for a widget with the
+    given scale factor, or None if its SVG has no #Device element.
+    Thumbnails are cached in $XDG_CACHE_HOME/piper/thumbnails, so this
+    only renders the SVG the first time. Safe to call from any thread.
+
+    @raises GLib.Error when the SVG cannot be loaded or parsed.
+    """
+    data = get_svg(model)
+    assert data is not None
+
+    path = _get_cache_path(data, scale)
+    surface = _load_cached(path)
+    if surface is None:
+        surface = _render(data, scale)
+        if surface is None:
+            return None
+        _store_cached(path, surface)
+    surface.set_device_scale(scale, scale)
+    return surface
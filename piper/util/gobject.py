@@ -1,4 +1,5 @@
-from typing import Callable, Union
+import weakref
+from typing import Any, Callable, List, Tuple, Union
 
 from gi.repository import GObject
 
@@ -19,3 +20,44 @@ def connect_signal_with_weak_ref(
     handler = obj.connect(signal, func, *args)
     ref_obj.weak_ref(lambda: obj.disconnect(handler))
     return handler
+
+
+class WeakSignalGroup:
+    """
+    Handlers connected like `connect_signal_with_weak_ref`, that can also be
+    disconnected all at once, e.g. to bind a widget to another object.
+    """
+
+    def __init__(self, ref_obj: Union[GObject.Object, GObject.GObject]) -> None:
+        # Don't keep ref_obj alive, it usually owns the group.
+        self._ref_obj = weakref.ref(ref_obj)
+        self._handlers: List[Tuple[GObject.Object, int, Any]] = []
+
+    def connect(
+        self,
+        obj: Union[GObject.Object, GObject.GObject],
+        signal: str,
+        func: Callable,
+        *args,
+    ) -> int:
+        """
+        Connect handler to an object `obj` tied to the life time of `ref_obj`
+        and of this group.
+        """
+
+        ref_obj = self._ref_obj()
+        assert ref_obj is not None
+        handler = obj.connect(signal, func, *args)
+        weak_ref = ref_obj.weak_ref(lambda: obj.disconnect(handler))
+        self._handlers.append((obj, handler, weak_ref))
+        return handler
+
+    def disconnect_all(self) -> None:
+        """
+        Disconnect all handlers connected through this group.
+        """
+
+        for obj, handler, weak_ref in self._handlers:
+            weak_ref.unref()
+            obj.disconnect(handler)
+        self._handlers = []
@@ -0,0 +1,159 @@
+import atexit
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, ContextManager, Dict, List, Optional, TypeVar
+
+# Opt-in tracing of where Piper spends its time, e.g. on startup. Run Piper
+# with PIPER_TRACE=/path/to/trace.json and the spans recorded are written to
+# that file on exit, in the Chrome trace event format that chrome://tracing
+# and https://ui.perfetto.dev open.
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+# The recorded events and the names of the threads they happened on by thread
+# id, None while tracing is disabled.
+_events: Optional[List[Dict[str, Any]]] = None
+_thread_names: Dict[int, str] = {}
+_path: Optional[str] = None
+
+
+def _now_us() -> int:
+    return time.perf_counter_ns() // 1000
+
+
+def _record(event: Dict[str, Any]) -> None:
+    # list.append() is atomic, spans may be recorded from worker threads.
+    assert _events is not None
+    thread = threading.current_thread()
+    _thread_names.setdefault(thread.ident or 0, thread.name)
+    event.update(pid=os.getpid(), tid=thread.ident or 0)
+    _events.append(event)
+
+
+def start(path: Optional[str] = None) -> None:
+    """
+    Start recording spans.
+
+    @param path The file to write the trace to on exit, or None to only keep
+                it in memory for `get_events`.
+    """
+    global _events, _path
+
+    if _events is None:
+        _events = []
+    _path = path
+
+
+def stop() -> None:
+    """
+    Stop recording spans and drop those recorded so far.
+    """
+    global _events, _path
+
+    _events = None
+    _path = None
+    _thread_names.clear()
+
+
+def is_enabled() -> bool:
+    """
+    Whether spans are being recorded.
+    """
+    return _events is not None
+
+
+def get_events() -> List[Dict[str, Any]]:
+    """
+    Return the trace events recorded so far, without the metadata events.
+    """
+    return list(_events or [])
+
+
+@contextlib.contextmanager
+def _span(name: str, args: Dict[str, Any]):
+    start_us = _now_us()
+    try:
+        yield
+    finally:
+        event = {"name": name, "cat": "piper", "ph": "X", "ts": start_us}
+        event["dur"] = _now_us() - start_us
+        if args:
+            event["args"] = args
+        _record(event)
+
+
+def span(name: str, **args: Any) -> ContextManager[None]:
+    """
+    Record the time spent in the `with` block as a span called `name`, with
+    `args` shown alongside it. Does nothing while tracing is disabled.
+    """
+    if _events is None:
+        return contextlib.nullcontext()
+    return _span(name, {k: str(v) for k, v in args.items()})
+
+
+def instant(name: str, **args: Any) -> None:
+    """
+    Record a point in time called `name`, e.g. the first frame drawn.
+    """
+    if _events is None:
+        return
+    event = {"name": name, "cat": "piper", "ph": "i", "s": "t", "ts": _now_us()}
+    if args:
+        event["args"] = {k: str(v) for k, v in args.items()}
+    _record(event)
+
+
+def traced(func: F) -> F:
+    """
+    Decorator recording every call to `func` as a span named after it.
+    """
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _events is None:
+            return func(*args, **kwargs)
+        with _span(name, {}):
+            return func(*args, **kwargs)
+
+    return wrapper  # type: ignore
+
+
+def write(path: str) -> None:
+    """
+    Write the spans recorded so far to `path`, in the Chrome trace event
+    format.
+    """
+    metadata = [
+        {
+            "name": "thread_name",
+            "ph": "M",
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": {"name": name},
+        }
+        for tid, name in list(_thread_names.items())
+    ]
+    with open(path, "w") as f:
+        json.dump({"traceEvents": metadata + get_events(), "displayTimeUnit": "ms"}, f)
+
+
+def _write_on_exit() -> None:
+    if _events is None or _path is None:
+        return
+    try:
+        write(_path)
+    except OSError as e:
+        print(f"Failed to write the trace to {_path}: {e}", file=sys.stderr)
+
+
+atexit.register(_write_on_exit)
+
+if os.environ.get("PIPER_TRACE"):
+    start(os.environ["PIPER_TRACE"])
@@ -1,7 +1,7 @@
 # SPDX-License-Identifier: GPL-2.0-or-later
 
 from gettext import gettext as _
-from typing import Callable, List, Optional
+from typing import Callable, List, Optional, Union
 
 from .errorperspective import ErrorPerspective
 from .mouseperspective import MousePerspective
@@ -12,6 +12,7 @@ from .ratbagd import (
     RatbagdIncompatibleError,
     RatbagdUnavailableError,
 )
+from .util import trace
 
 import gi
 
@@ -31,6 +32,7 @@ class Window(Gtk.ApplicationWindow):
     stack_perspectives: Gtk.Stack = Gtk.Template.Child()  # type: ignore
     stack_titlebar: Gtk.Stack = Gtk.Template.Child()  # type: ignore
 
+    @trace.traced
     def __init__(self, init_ratbagd_cb: Callable[[], Ratbagd], *args, **kwargs) -> None:
         """Instantiates a new Window.
 
@@ -42,7 +44,8 @@ class Window(Gtk.ApplicationWindow):
 
         self._add_perspective(ErrorPerspective(), None)
         try:
-            ratbag = init_ratbagd_cb()
+            with trace.span("init ratbagd"):
+                ratbag = init_ratbagd_cb()
         except RatbagdUnavailableError:
             self._present_error_perspective(
                 _("Cannot connect to ratbagd"),
@@ -60,11 +63,14 @@ class Window(Gtk.ApplicationWindow):
             )
             return
 
-        for perspective in [MousePerspective(), WelcomePerspective()]:
-            self._add_perspective(perspective, ratbag)
+        with trace.span("add perspectives"):
+            for perspective in [MousePerspective(), WelcomePerspective()]:
+                self._add_perspective(perspective, ratbag)
 
         welcome_perspective: WelcomePerspective = self._get_child("welcome_perspective")  # type: ignore
         welcome_perspective.connect("device-selected", self._on_device_selected)
+        mouse_perspective: MousePerspective = self._get_child("mouse_perspective")  # type: ignore
+        mouse_perspective.connect("page-failed", self._on_mouse_page_failed)
 
         ratbag.connect("device-added", self._on_device_added)
         ratbag.connect("device-removed", self._on_device_removed)
@@ -172,22 +178,34 @@ class Window(Gtk.ApplicationWindow):
 
             self.stack_titlebar.set_visible_child_name(mouse_perspective.name)
             self.stack_perspectives.set_visible_child_name(mouse_perspective.name)
-        except ValueError as e:
-            self._present_error_perspective(_("Cannot display device SVG"), str(e))
-        except GLib.Error as e:
+        except (ValueError, GLib.Error) as e:
+            self._present_device_error(e)
+
+    def _on_mouse_page_failed(
+        self, perspective: MousePerspective, error: Union[ValueError, GLib.Error]
+    ) -> None:
+        # A page of the mouse perspective failed to build after it was
+        # presented, e.g. when switching to the buttons page.
+        self._present_device_error(error)
+
+    def _present_device_error(self, error: Union[ValueError, GLib.Error]) -> None:
+        # Present the error perspective for an error building the mouse
+        # perspective's pages.
+        if isinstance(error, ValueError):
+            self._present_error_perspective(_("Cannot display device SVG"), str(error))
+        elif error.code == Gio.DBusError.UNKNOWN_METHOD:
             # Happens with the GetSvgFd() call when running against older
             # python. This can be removed when we've had the newer call out
             # for a while. The full error is printed to stderr by
             # ratbagd.py.
-            if e.code == Gio.DBusError.UNKNOWN_METHOD:
-                self._present_error_perspective(
-                    _("Newer version of ratbagd required"),
-                    _("Please update to the latest available version"),
-                )
-            else:
-                self._present_error_perspective(
-                    _("Unknown exception occurred"), e.message
-                )
+            self._present_error_perspective(
+                _("Newer version of ratbagd required"),
+                _("Please update to the latest available version"),
+            )
+        else:
+            self._present_error_perspective(
+                _("Unknown exception occurred"), error.message
+            )
 
     def _present_error_perspective(self, message: str, detail: str) -> None:
         # Present the error perspective informing the user of any errors.
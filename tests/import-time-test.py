@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+#
+# Checks what importing piper.application, i.e. everything piper loads before
+# its first window is shown, costs: the modules that are only needed once a
+# device is shown must not be imported, and the time `python -X importtime`
+# measures for all of it must stay within a budget.
+#
+# Usage: import-time-test.py /path/to/piper/ /path/to/piper.gresource [unittest args]
+
+import argparse
+import os
+import subprocess
+import sys
+import unittest
+
+# Imported on first use, see the function-level imports in piper.
+DEFERRED_MODULES = [
+    "cairo",
+    "evdev",
+    "lxml",
+    "piper.advancedpage",
+    "piper.buttondialog",
+    "piper.buttonspage",
+    "piper.leddialog",
+    "piper.ledspage",
+    "piper.mousemap",
+    "piper.resolutionspage",
+    "piper.svg",
+    "piper.thumbnails",
+]
+
+# The time in milliseconds that importing piper.application may take on top
+# of gi and the GTK stack, which are imported beforehand. Override with
+# PIPER_IMPORT_BUDGET_MS on slow machines.
+#
+# This is a tripwire for new eager imports the list above doesn't know about,
+# not a benchmark: on a single-core CI container piper.ratbagd, the largest of
+# piper's own startup modules, takes about 15 ms including its imports, while
+# evdev alone takes 40-50 ms and lxml.etree about 15 ms. The budget leaves
+# room for the rest of piper and for slower machines, so it only catches
+# regressions of that order, the list above catches the known ones.
+IMPORT_BUDGET_MS = 300
+
+MARKER = "--- importing piper.application ---"
+
+# Run in a separate interpreter, so nothing imported by this script counts.
+CHILD = f"""
+import sys
+
+import gi
+
+gi.require_version("Gtk", "3.0")
+from gi.repository import Gdk, Gio, GLib, GObject, Gtk
+
+Gio.Resource._register(Gio.resource_load(sys.argv[2]))
+sys.path.insert(0, sys.argv[1])
+print({MARKER!r}, file=sys.stderr, flush=True)
+import piper.application
+"""
+
+srcdir = None
+gresource = None
+
+
+def import_application():
+    """Imports piper.application in a new interpreter and returns the
+    modules imported, as (name, self time in us) tuples."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD, srcdir, gresource],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    lines = result.stderr.splitlines()
+    modules = []
+    for line in lines[lines.index(MARKER) + 1 :]:
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _cumulative, name = line[len("import time:") :].split("|")
+        modules.append((name.strip(), int(self_us)))
+    return modules
+
+
+def total_ms(modules):
+    """Returns the time importing the given modules took, in ms."""
+    return sum(self_us for _name, self_us in modules) / 1000
+
+
+class TestImportTime(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # The first run may have to write the bytecode caches. Of the runs
+        # after it, keep the fastest, the others only measured more noise.
+        import_application()
+        runs = [import_application() for _ in range(3)]
+        cls.modules = min(runs, key=total_ms)
+
+    def test_deferred_modules(self):
+        names = {name for name, _self_us in self.modules}
+        for module in DEFERRED_MODULES:
+            imported = {n for n in names if n == module or n.startswith(f"{module}.")}
+            self.assertFalse(imported, msg=f"{module} is imported on startup")
+
+    def test_budget(self):
+        budget = int(os.environ.get("PIPER_IMPORT_BUDGET_MS", IMPORT_BUDGET_MS))
+        total = total_ms(self.modules)
+        slowest = sorted(self.modules, key=lambda m: m[1], reverse=True)[:5]
+        message = f"Importing piper.application took {total:.0f} ms, slowest: {slowest}"
+        # In the test log for comparison, also when within the budget.
+        print(message)
+        self.assertLessEqual(total, budget, msg=message)
+
+
+def main():
+    global srcdir, gresource
+
+    parser = argparse.ArgumentParser(description="piper import time tests")
+    parser.add_argument("srcdir", help="Path to the piper sources")
+    parser.add_argument("gresource", help="Path to the built piper.gresource")
+    args, remainder = parser.parse_known_args()
+
+    try:
+        import gi
+
+        gi.require_version("Gtk", "3.0")
+    except (ImportError, ValueError):
+        print("GTK 3 not found. Skipping")
+        sys.exit(77)
+
+    srcdir = args.srcdir
+    gresource = args.gresource
+    unittest.main(argv=[sys.argv[0], *remainder])
+
+
+if __name__ == "__main__":
+    main()
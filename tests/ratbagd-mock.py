@@ -0,0 +1,609 @@
+#!/usr/bin/env python3
+# SPDX-License-Identifier: GPL-2.0-or-later
+#
+# A pure-Python stand-in for ratbagd, for benchmarks and tests that must run
+# without hardware.
+#
+# The mock owns org.freedesktop.ratbag_devel1, the name piper's ratbagd.py
+# talks to when RATBAG_TEST is set, and serves the Manager, Device, Profile,
+# Resolution, Button and Led interfaces for the devices described in a JSON
+# file. Like piper itself it uses the system bus, so point both at a private
+# bus through DBUS_SYSTEM_BUS_ADDRESS:
+#
+#   $ dbus-daemon --session --print-address --fork
+#   unix:abstract=/tmp/dbus-XXXXXXXX,guid=...
+#   $ export DBUS_SYSTEM_BUS_ADDRESS=unix:abstract=/tmp/dbus-XXXXXXXX
+#   $ ./tests/ratbagd-mock.py tests/ratbagd-mock-devices.json &
+#   $ RATBAG_TEST=1 ./builddir/piper.devel
+#
+# The device description is either a list of devices or an object with a
+# "devices" list, see tests/ratbagd-mock-devices.json for the format. Missing
+# keys fall back to the defaults in the _*_DEFAULTS tables below.
+
+import argparse
+import json
+import sys
+import time
+
+from gi.repository import Gio, GLib
+
+RATBAG_NAME = "org.freedesktop.ratbag_devel1"
+RATBAG_PATH = "/org/freedesktop/ratbag_devel1"
+API_VERSION = 2
+
+ERROR_FAILED = "org.freedesktop.DBus.Error.Failed"
+
+_INTROSPECTION = f"""
+<node>
+  <interface name="{RATBAG_NAME}.Manager">
+    <property name="APIVersion" type="i" access="read"/>
+    <property name="Devices" type="ao" access="read"/>
+    <method name="LoadTestDevice">
+      <arg name="data" type="s" direction="in"/>
+      <arg name="result" type="i" direction="out"/>
+    </method>
+    <method name="RemoveTestDevice">
+      <arg name="device" type="o" direction="in"/>
+      <arg name="result" type="i" direction="out"/>
+    </method>
+  </interface>
+  <interface name="{RATBAG_NAME}.Device">
+    <property name="Model" type="s" access="read"/>
+    <property name="Name" type="s" access="read"/>
+    <property name="DeviceType" type="u" access="read"/>
+    <property name="FirmwareVersion" type="s" access="read"/>
+    <property name="Profiles" type="ao" access="read"/>
+    <method name="Commit">
+      <arg name="result" type="u" direction="out"/>
+    </method>
+    <signal name="Resync"/>
+  </interface>
+  <interface name="{RATBAG_NAME}.Profile">
+    <property name="Index" type="u" access="read"/>
+    <property name="Name" type="s" access="readwrite"/>
+    <property name="Capabilities" type="au" access="read"/>
+    <property name="Disabled" type="b" access="readwrite"/>
+    <property name="IsActive" type="b" access="read"/>
+    <property name="IsDirty" type="b" access="read"/>
+    <property name="ReportRate" type="u" access="readwrite"/>
+    <property name="ReportRates" type="au" access="read"/>
+    <property name="AngleSnapping" type="i" access="readwrite"/>
+    <property name="Debounce" type="i" access="readwrite"/>
+    <property name="Debounces" type="au" access="read"/>
+    <property name="Resolutions" type="ao" access="read"/>
+    <property name="Buttons" type="ao" access="read"/>
+    <property name="Leds" type="ao" access="read"/>
+    <method name="SetActive">
+      <arg name="result" type="u" direction="out"/>
+    </method>
+  </interface>
+  <interface name="{RATBAG_NAME}.Resolution">
+    <property name="Index" type="u" access="read"/>
+    <property name="Capabilities" type="au" access="read"/>
+    <property name="IsActive" type="b" access="read"/>
+    <property name="IsDefault" type="b" access="read"/>
+    <property name="IsDisabled" type="b" access="readwrite"/>
+    <property name="Resolution" type="v" access="readwrite"/>
+    <property name="Resolutions" type="au" access="read"/>
+    <method name="SetActive">
+      <arg name="result" type="u" direction="out"/>
+    </method>
+    <method name="SetDefault">
+      <arg name="result" type="u" direction="out"/>
+    </method>
+  </interface>
+  <interface name="{RATBAG_NAME}.Button">
+    <property name="Index" type="u" access="read"/>
+    <property name="Mapping" type="(uv)" access="readwrite"/>
+    <property name="ActionTypes" type="au" access="read"/>
+  </interface>
+  <interface name="{RATBAG_NAME}.Led">
+    <property name="Index" type="u" access="read"/>
+    <property name="Mode" type="u" access="readwrite"/>
+    <property name="Modes" type="au" access="read"/>
+    <property name="Color" type="(uuu)" access="readwrite"/>
+    <property name="ColorDepth" type="u" access="read"/>
+    <property name="EffectDuration" type="u" access="readwrite"/>
+    <property name="Brightness" type="u" access="readwrite"/>
+  </interface>
+</node>
+"""
+
+_NODE_INFO = Gio.DBusNodeInfo.new_for_xml(_INTROSPECTION)
+
+_DEVICE_DEFAULTS = {
+    "name": "Piper Test Mouse",
+    "model": "usb:1234:5678:0",
+    "device_type": 2,
+    "firmware_version": "",
+    "profiles": [{}],
+}
+
+_PROFILE_DEFAULTS = {
+    "name": "",
+    "capabilities": [],
+    "disabled": False,
+    "is_active": False,
+    "report_rate": 1000,
+    "report_rates": [125, 250, 500, 1000],
+    "angle_snapping": -1,
+    "debounce": -1,
+    "debounces": [],
+    "resolutions": [{}],
+    "buttons": [],
+    "leds": [],
+}
+
+_RESOLUTION_DEFAULTS = {
+    "capabilities": [],
+    "is_active": False,
+    "is_default": False,
+    "is_disabled": False,
+    "resolution": [800],
+    "resolutions": list(range(400, 4001, 50)),
+}
+
+_BUTTON_DEFAULTS = {
+    "mapping": {"type": 1, "value": None},
+    "action_types": [0, 1, 2, 3, 4],
+}
+
+_LED_DEFAULTS = {
+    "mode": 1,
+    "modes": [0, 1, 2, 3],
+    "color": [255, 0, 0],
+    "color_depth": 1,
+    "effect_duration": 1000,
+    "brightness": 255,
+}
+
+
+def _with_defaults(description, defaults):
+    merged = dict(defaults)
+    merged.update(description)
+    return merged
+
+
+class MockConfig:
+    """Per-call latency and failure injection shared by all mock objects."""
+
+    def __init__(self, latency_ms=0, failures=None):
+        self.latency_ms = latency_ms
+        # Maps a method or property name to None (fail with a D-Bus error)
+        # or to the RatbagErrorCode a method should return instead.
+        self.failures = failures or {}
+
+    def filter_message(self, connection, message, incoming):
+        # Installed as a connection filter so the latency applies once per
+        # incoming call, including Get/Set/GetAll, much like a busy daemon.
+        if (
+            incoming
+            and self.latency_ms > 0
+            and message.get_message_type() == Gio.DBusMessageType.METHOD_CALL
+        ):
+            time.sleep(self.latency_ms / 1000)
+        return message
+
+
+class MockObject:
+    """A single exported object implementing one ratbagd interface."""
+
+    interface = ""
+
+    def __init__(self, daemon, object_path, properties, writable=()):
+        self._daemon = daemon
+        self.object_path = object_path
+        self.properties = properties
+        self._writable = set(writable)
+        self._registration_id = 0
+
+    @property
+    def interface_name(self):
+        return f"{RATBAG_NAME}.{self.interface}"
+
+    def register(self, connection):
+        info = _NODE_INFO.lookup_interface(self.interface_name)
+        self._registration_id = connection.register_object(
+            self.object_path,
+            info,
+            self._on_method_call,
+            self._on_get_property,
+            self._on_set_property,
+        )
+
+    def unregister(self, connection):
+        if self._registration_id:
+            connection.unregister_object(self._registration_id)
+            self._registration_id = 0
+
+    def set_properties(self, **changed):
+        """Updates the given properties and emits PropertiesChanged for the
+        ones whose value differs."""
+        changed = {
+            name: value
+            for name, value in changed.items()
+            if self.properties[name] != value
+        }
+        if not changed:
+            return
+        self.properties.update(changed)
+        self._daemon.emit_signal(
+            self.object_path,
+            "org.freedesktop.DBus.Properties",
+            "PropertiesChanged",
+            GLib.Variant("(sa{sv}as)", (self.interface_name, changed, [])),
+        )
+
+    def on_property_written(self, name):
+        # Implement this in derived classes to react to a client's write.
+        pass
+
+    def _on_method_call(
+        self, connection, sender, path, interface, method, parameters, invocation
+    ):
+        config = self._daemon.config
+        if method in config.failures:
+            code = config.failures[method]
+            if code is None:
+                invocation.return_dbus_error(ERROR_FAILED, f"{method} failed")
+            else:
+                invocation.return_value(GLib.Variant("(u)", (code & 0xFFFFFFFF,)))
+            return
+
+        handler = getattr(self, f"do_{method}", None)
+        if handler is None:
+            invocation.return_dbus_error(
+                "org.freedesktop.DBus.Error.UnknownMethod", f"No method {method}"
+            )
+            return
+        invocation.return_value(handler(*parameters.unpack()))
+
+    def _on_get_property(self, connection, sender, path, interface, name):
+        return self.properties[name]
+
+    def _on_set_property(self, connection, sender, path, interface, name, value):
+        config = self._daemon.config
+        if name in config.failures or name not in self._writable:
+            return False
+        self.set_properties(**{name: value})
+        self.on_property_written(name)
+        return True
+
+
+class MockProfileChild(MockObject):
+    """A resolution, button or LED. Writes to it make its profile dirty."""
+
+    def __init__(self, daemon, object_path, profile, properties, writable=()):
+        super().__init__(daemon, object_path, properties, writable)
+        self.profile = profile
+
+    def on_property_written(self, name):
+        self.profile.set_properties(IsDirty=GLib.Variant("b", True))
+
+
+class MockResolution(MockProfileChild):
+    interface = "Resolution"
+
+    def __init__(self, daemon, object_path, profile, index, description):
+        d = _with_defaults(description, _RESOLUTION_DEFAULTS)
+        res = d["resolution"]
+        if len(res) == 1:
+            resolution = GLib.Variant("u", res[0])
+        else:
+            resolution = GLib.Variant("(uu)", tuple(res))
+        properties = {
+            "Index": GLib.Variant("u", index),
+            "Capabilities": GLib.Variant("au", d["capabilities"]),
+            "IsActive": GLib.Variant("b", d["is_active"]),
+            "IsDefault": GLib.Variant("b", d["is_default"]),
+            "IsDisabled": GLib.Variant("b", d["is_disabled"]),
+            "Resolution": GLib.Variant("v", resolution),
+            "Resolutions": GLib.Variant("au", d["resolutions"]),
+        }
+        super().__init__(
+            daemon,
+            object_path,
+            profile,
+            properties,
+            writable=("IsDisabled", "Resolution"),
+        )
+
+    def _set_exclusive(self, name):
+        for resolution in self.profile.resolutions:
+            value = GLib.Variant("b", resolution is self)
+            resolution.set_properties(**{name: value})
+
+    def do_SetActive(self):
+        self._set_exclusive("IsActive")
+        return GLib.Variant("(u)", (0,))
+
+    def do_SetDefault(self):
+        self._set_exclusive("IsDefault")
+        self.on_property_written("IsDefault")
+        return GLib.Variant("(u)", (0,))
+
+
+class MockButton(MockProfileChild):
+    interface = "Button"
+
+    def __init__(self, daemon, object_path, profile, index, description):
+        d = _with_defaults(description, _BUTTON_DEFAULTS)
+        action_type = d["mapping"].get("type", 1)
+        value = d["mapping"].get("value")
+        if action_type == 4:
+            mapping = GLib.Variant("a(uu)", [tuple(v) for v in value or []])
+        else:
+            # Buttons are mapped to their own (1-indexed) button by default.
+            mapping = GLib.Variant("u", index + 1 if value is None else value)
+        properties = {
+            "Index": GLib.Variant("u", index),
+            "Mapping": GLib.Variant("(uv)", (action_type, mapping)),
+            "ActionTypes": GLib.Variant("au", d["action_types"]),
+        }
+        super().__init__(daemon, object_path, profile, properties, ("Mapping",))
+
+
+class MockLed(MockProfileChild):
+    interface = "Led"
+
+    def __init__(self, daemon, object_path, profile, index, description):
+        d = _with_defaults(description, _LED_DEFAULTS)
+        properties = {
+            "Index": GLib.Variant("u", index),
+            "Mode": GLib.Variant("u", d["mode"]),
+            "Modes": GLib.Variant("au", d["modes"]),
+            "Color": GLib.Variant("(uuu)", tuple(d["color"])),
+            "ColorDepth": GLib.Variant("u", d["color_depth"]),
+            "EffectDuration": GLib.Variant("u", d["effect_duration"]),
+            "Brightness": GLib.Variant("u", d["brightness"]),
+        }
+        super().__init__(
+            daemon,
+            object_path,
+            profile,
+            properties,
+            writable=("Mode", "Color", "EffectDuration", "Brightness"),
+        )
+
+
+class MockProfile(MockObject):
+    interface = "Profile"
+
+    def __init__(self, daemon, object_path, device, index, description):
+        d = _with_defaults(description, _PROFILE_DEFAULTS)
+        self.device = device
+        self.resolutions = [
+            MockResolution(daemon, f"{object_path}/r{i}", self, i, r)
+            for i, r in enumerate(d["resolutions"])
+        ]
+        self.buttons = [
+            MockButton(daemon, f"{object_path}/b{i}", self, i, b)
+            for i, b in enumerate(d["buttons"])
+        ]
+        self.leds = [
+            MockLed(daemon, f"{object_path}/l{i}", self, i, led)
+            for i, led in enumerate(d["leds"])
+        ]
+        properties = {
+            "Index": GLib.Variant("u", index),
+            "Name": GLib.Variant("s", d["name"]),
+            "Capabilities": GLib.Variant("au", d["capabilities"]),
+            "Disabled": GLib.Variant("b", d["disabled"]),
+            "IsActive": GLib.Variant("b", d["is_active"]),
+            "IsDirty": GLib.Variant("b", False),
+            "ReportRate": GLib.Variant("u", d["report_rate"]),
+            "ReportRates": GLib.Variant("au", d["report_rates"]),
+            "AngleSnapping": GLib.Variant("i", d["angle_snapping"]),
+            "Debounce": GLib.Variant("i", d["debounce"]),
+            "Debounces": GLib.Variant("au", d["debounces"]),
+            "Resolutions": GLib.Variant(
+                "ao", [r.object_path for r in self.resolutions]
+            ),
+            "Buttons": GLib.Variant("ao", [b.object_path for b in self.buttons]),
+            "Leds": GLib.Variant("ao", [led.object_path for led in self.leds]),
+        }
+        super().__init__(
+            daemon,
+            object_path,
+            properties,
+            writable=("Name", "Disabled", "ReportRate", "AngleSnapping", "Debounce"),
+        )
+
+    @property
+    def children(self):
+        return [*self.resolutions, *self.buttons, *self.leds]
+
+    def on_property_written(self, name):
+        self.set_properties(IsDirty=GLib.Variant("b", True))
+
+    def do_SetActive(self):
+        for profile in self.device.profiles:
+            profile.set_properties(IsActive=GLib.Variant("b", profile is self))
+        return GLib.Variant("(u)", (0,))
+
+
+class MockDevice(MockObject):
+    interface = "Device"
+
+    def __init__(self, daemon, object_path, description):
+        d = _with_defaults(description, _DEVICE_DEFAULTS)
+        self.profiles = [
+            MockProfile(daemon, f"{object_path}/p{i}", self, i, p)
+            for i, p in enumerate(d["profiles"])
+        ]
+        if not any(p.properties["IsActive"].unpack() for p in self.profiles):
+            self.profiles[0].properties["IsActive"] = GLib.Variant("b", True)
+        properties = {
+            "Model": GLib.Variant("s", d["model"]),
+            "Name": GLib.Variant("s", d["name"]),
+            "DeviceType": GLib.Variant("u", d["device_type"]),
+            "FirmwareVersion": GLib.Variant("s", d["firmware_version"]),
+            "Profiles": GLib.Variant("ao", [p.object_path for p in self.profiles]),
+        }
+        super().__init__(daemon, object_path, properties)
+
+    @property
+    def objects(self):
+        yield self
+        for profile in self.profiles:
+            yield profile
+            yield from profile.children
+
+    def do_Commit(self):
+        for profile in self.profiles:
+            profile.set_properties(IsDirty=GLib.Variant("b", False))
+        return GLib.Variant("(u)", (0,))
+
+    def _on_method_call(
+        self, connection, sender, path, interface, method, parameters, invocation
+    ):
+        # ratbagd resynchronizes the device when committing fails.
+        if method == "Commit" and method in self._daemon.config.failures:
+            self._daemon.emit_signal(
+                self.object_path, self.interface_name, "Resync", None
+            )
+        super()._on_method_call(
+            connection, sender, path, interface, method, parameters, invocation
+        )
+
+
+class MockManager(MockObject):
+    interface = "Manager"
+
+    def __init__(self, daemon):
+        properties = {
+            "APIVersion": GLib.Variant("i", API_VERSION),
+            "Devices": GLib.Variant("ao", []),
+        }
+        super().__init__(daemon, RATBAG_PATH, properties)
+        self.devices = []
+        self._next_device = 0
+
+    def add_device(self, description):
+        object_path = f"{RATBAG_PATH}/device/d{self._next_device}"
+        self._next_device += 1
+        device = MockDevice(self._daemon, object_path, description)
+        for obj in device.objects:
+            obj.register(self._daemon.connection)
+        self.devices.append(device)
+        self._update_devices()
+        return device
+
+    def remove_device(self, object_path):
+        for device in self.devices:
+            if device.object_path == object_path:
+                self.devices.remove(device)
+                self._update_devices()
+                for obj in device.objects:
+                    obj.unregister(self._daemon.connection)
+                return True
+        return False
+
+    def _update_devices(self):
+        paths = [d.object_path for d in self.devices]
+        self.set_properties(Devices=GLib.Variant("ao", paths))
+
+    def do_LoadTestDevice(self, data):
+        try:
+            self.add_device(json.loads(data))
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"Invalid test device: {e}", file=sys.stderr)
+            return GLib.Variant("(i)", (-1002,))
+        return GLib.Variant("(i)", (0,))
+
+    def do_RemoveTestDevice(self, object_path):
+        if not self.remove_device(object_path):
+            return GLib.Variant("(i)", (-1002,))
+        return GLib.Variant("(i)", (0,))
+
+
+class MockDaemon:
+    """Owns the ratbag_devel1 name and the exported object tree."""
+
+    def __init__(self, connection, config):
+        self.connection = connection
+        self.config = config
+        connection.add_filter(config.filter_message)
+        self.manager = MockManager(self)
+        self.manager.register(connection)
+
+    def emit_signal(self, object_path, interface, signal, parameters):
+        self.connection.emit_signal(None, object_path, interface, signal, parameters)
+
+    def load(self, description):
+        if isinstance(description, dict):
+            description = description.get("devices", [])
+        for device in description:
+            self.manager.add_device(device)
+
+
+def _parse_failure(value):
+    name, _, code = value.partition(":")
+    return name, int(code) if code else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="A mock ratbagd for tests")
+    parser.add_argument(
+        "devices", nargs="?", help="JSON file describing the devices to serve"
+    )
+    parser.add_argument(
+        "--address", help="Bus address, defaults to the (overridable) system bus"
+    )
+    parser.add_argument(
+        "--latency",
+        type=int,
+        default=0,
+        metavar="MS",
+        help="Delay every method call and property access by MS milliseconds",
+    )
+    parser.add_argument(
+        "--fail",
+        type=_parse_failure,
+        action="append",
+        default=[],
+        metavar="NAME[:CODE]",
+        help="Make the method or property NAME fail, either with a D-Bus error "
+        "or by returning the given RatbagErrorCode",
+    )
+    args = parser.parse_args()
+
+    if args.address:
+        connection = Gio.DBusConnection.new_for_address_sync(
+            args.address,
+            Gio.DBusConnectionFlags.AUTHENTICATION_CLIENT
+            | Gio.DBusConnectionFlags.MESSAGE_BUS_CONNECTION,
+            None,
+            None,
+        )
+    else:
+        connection = Gio.bus_get_sync(Gio.BusType.SYSTEM, None)
+
+    daemon = MockDaemon(connection, MockConfig(args.latency, dict(args.fail)))
+    if args.devices:
+        with open(args.devices) as f:
+            daemon.load(json.load(f))
+
+    loop = GLib.MainLoop()
+
+    def on_name_acquired(connection, name):
+        # Tests wait for this line before talking to us.
+        print(f"ready {name}", flush=True)
+
+    def on_name_lost(connection, name):
+        print(f"Cannot own {name}", file=sys.stderr)
+        loop.quit()
+
+    Gio.bus_own_name_on_connection(
+        connection,
+        RATBAG_NAME,
+        Gio.BusNameOwnerFlags.NONE,
+        on_name_acquired,
+        on_name_lost,
+    )
+    loop.run()
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,588 @@
+#!/usr/bin/env python3
+#
+# Runs piper.ratbagd against tests/ratbagd-mock.py on a private bus.
+#
+# Usage: ratbagd-test.py /path/to/piper/ [unittest args]
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+from pathlib import Path
+
+from gi.repository import Gio, GLib
+
+MOCK = Path(__file__).parent / "ratbagd-mock.py"
+DEVICES = Path(__file__).parent / "ratbagd-mock-devices.json"
+
+ratbagd = None
+bus = None
+
+
+class PrivateBus:
+    """A dbus-daemon that stands in for the system bus for this process and
+    its children."""
+
+    def __init__(self):
+        out = subprocess.run(
+            ["dbus-daemon", "--session", "--print-address", "--print-pid", "--fork"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        self.address = out[0]
+        self._pid = int(out[1])
+        os.environ["DBUS_SYSTEM_BUS_ADDRESS"] = self.address
+        os.environ["RATBAG_TEST"] = "1"
+
+    def stop(self):
+        os.kill(self._pid, 15)
+
+
+class MockRatbagd:
+    """A running tests/ratbagd-mock.py, started with the given arguments."""
+
+    def __init__(self, *args):
+        self._process = subprocess.Popen(
+            [sys.executable, str(MOCK), str(DEVICES), *args],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        line = self._process.stdout.readline()
+        if not line.startswith("ready"):
+            self.stop()
+            raise RuntimeError("ratbagd-mock.py failed to start")
+
+    def stop(self):
+        self._process.terminate()
+        self._process.wait()
+
+
+def spin(condition=None, timeout=2.0):
+    """Iterates the main context until condition() is true, or for the whole
+    timeout without a condition. Returns the last result of condition()."""
+    context = GLib.MainContext.default()
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition is not None and condition():
+            return True
+        if not context.iteration(False):
+            time.sleep(0.005)
+    return condition() if condition is not None else None
+
+
+class RatbagdTestCase(unittest.TestCase):
+    # Arguments for tests/ratbagd-mock.py, see its --help.
+    mock_args = ()
+
+    @classmethod
+    def setUpClass(cls):
+        cls.mock = MockRatbagd(*cls.mock_args)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mock.stop()
+
+    def setUp(self):
+        self.ratbagd = ratbagd.Ratbagd(2)
+        self.device = self.ratbagd.devices[0]
+        self.profile = self.device.active_profile
+
+    def tearDown(self):
+        # Don't let one test's writes leak into the next one.
+        ratbagd.RatbagdDevice._flush_pending_writes()
+        self.device.commit()
+        spin(timeout=0.1)
+        # Or its Ratbagd follow the next test's changes.
+        self.ratbagd.close()
+
+
+class TestStartup(RatbagdTestCase):
+    def test_devices(self):
+        self.assertEqual(len(self.ratbagd.devices), 1)
+        self.assertEqual(self.device.name, "Piper Test Mouse")
+        self.assertEqual(self.device.model, "usb:046d:c08b:0")
+        self.assertIs(self.ratbagd[self.device.id], self.device)
+        self.assertIsNone(self.ratbagd["nonexistent"])
+
+    def test_profiles(self):
+        self.assertEqual(len(self.device.profiles), 2)
+        self.assertEqual(self.profile.index, 0)
+        self.assertTrue(self.device.profiles[1].disabled)
+        self.assertIn(ratbagd.RatbagdProfile.CAP_SET_DEFAULT, self.profile.capabilities)
+        self.assertEqual(self.profile.debounces, (2, 4, 8))
+
+    def test_lazy_children(self):
+        other = self.device.profiles[1]
+        self.assertFalse(other.is_loaded)
+        self.assertEqual(len(other.buttons), 5)
+        self.assertTrue(other.is_loaded)
+
+    def test_idle_loading(self):
+        self.device.load_profiles_in_idle()
+        spin(lambda: all(p.is_loaded for p in self.device.profiles))
+        self.assertTrue(all(p.is_loaded for p in self.device.profiles))
+
+    def test_mappings(self):
+        buttons = self.profile.buttons
+        ActionType = ratbagd.RatbagdButton.ActionType
+        self.assertEqual(buttons[0].mapping, 1)
+        self.assertEqual(buttons[3].action_type, ActionType.SPECIAL)
+        self.assertEqual(buttons[4].action_type, ActionType.MACRO)
+        self.assertEqual(str(buttons[4].macro), "↕KEY_A")
+
+
+class TestWrites(RatbagdTestCase):
+    def test_write_and_commit(self):
+        resolution = self.profile.resolutions[0]
+        resolution.resolution = (1000,)
+        self.assertTrue(spin(lambda: resolution.resolution == (1000,)))
+        self.assertTrue(spin(lambda: self.profile.dirty))
+        self.device.commit()
+        self.assertTrue(spin(lambda: not self.profile.dirty))
+
+    def test_coalescing(self):
+        resolution = self.profile.resolutions[1]
+        changes = []
+        resolution._proxy.connect(
+            "g-properties-changed", lambda proxy, changed, inv: changes.append(changed)
+        )
+        for value in range(400, 2000, 100):
+            resolution.resolution = (value,)
+        spin(timeout=0.5)
+        self.assertEqual(resolution.resolution, (1900,))
+        self.assertEqual(len(changes), 1)
+
+    def test_echo_while_pending(self):
+        resolution = self.profile.resolutions[1]
+        ratbagd.set_write_behind_ms(0)
+        try:
+            resolution.resolution = (1000,)
+        finally:
+            ratbagd.set_write_behind_ms(50)
+        # Still queued when the echo of the first write comes in, which must
+        # not snap the resolution back to 1000.
+        resolution.resolution = (1100,)
+        notified = []
+        resolution.connect(
+            "notify::resolution", lambda r, pspec: notified.append(r.resolution)
+        )
+        self.assertTrue(spin(lambda: notified))
+        spin(timeout=0.1)
+        self.assertEqual(notified, [(1100,)])
+        self.assertEqual(resolution._get_dbus_property("Resolution"), 1100)
+
+    def test_set_active(self):
+        resolution = self.profile.resolutions[1]
+        done = []
+        resolution.set_active(callback=lambda result, error: done.append(error))
+        self.assertEqual(done, [])
+        self.assertTrue(spin(lambda: done))
+        self.assertEqual(done, [None])
+        self.assertTrue(spin(lambda: resolution.is_active))
+
+    def test_transaction(self):
+        dirty = []
+        for profile in self.device.profiles:
+            profile.connect("notify::dirty", lambda p, pspec: dirty.append(p))
+        with self.device.transaction():
+            for profile in self.device.profiles:
+                profile.buttons[0].mapping = 3
+                profile.buttons[1].mapping = 3
+            self.assertEqual(len(ratbagd.RatbagdDevice._pending_writes), 4)
+        self.assertEqual(len(ratbagd.RatbagdDevice._pending_writes), 0)
+        spin(lambda: len(dirty) == 2, timeout=1.0)
+        spin(timeout=0.2)
+        self.assertEqual(sorted(p.index for p in dirty), [0, 1])
+
+    def test_transaction_raises(self):
+        button = self.profile.buttons[0]
+        resolution = self.profile.resolutions[0]
+        mapping = button.mapping
+        # Queued before the transaction, so it must survive it.
+        resolution.set_disabled(True)
+        with self.assertRaises(RuntimeError), self.device.transaction():
+            button.mapping = 3
+            resolution.set_disabled(False)
+            raise RuntimeError("bail out")
+        pending = ratbagd.RatbagdDevice._pending_writes
+        self.assertEqual(list(pending), [(resolution._object_path, "IsDisabled")])
+        self.assertEqual(button.mapping, mapping)
+        self.assertTrue(resolution._get_dbus_property("IsDisabled"))
+        resolution.set_disabled(False)
+
+        # Notifications are no longer held back.
+        notified = []
+        self.profile.connect("notify::dirty", lambda p, pspec: notified.append(p))
+        self.profile.notify("dirty")
+        self.assertEqual(notified, [self.profile])
+
+    def test_transaction_callback_raises(self):
+        def callback(result, error):
+            raise RuntimeError("callback failed")
+
+        errors = []
+        with mock.patch.object(sys, "excepthook", lambda *args: errors.append(args[1])):
+            with self.device.transaction():
+                self.profile.resolutions[0]._set_dbus_property_async(
+                    "IsDisabled", "b", False, callback=callback
+                )
+            self.assertTrue(spin(lambda: errors))
+        self.assertIsInstance(errors[0], RuntimeError)
+
+        notified = []
+        self.profile.connect("notify::dirty", lambda p, pspec: notified.append(p))
+        self.profile.notify("dirty")
+        self.assertEqual(notified, [self.profile])
+
+
+class TestHotplug(RatbagdTestCase):
+    def test_add_remove(self):
+        added = []
+        removed = []
+        self.ratbagd.connect("device-added", lambda r, d: added.append(d))
+        self.ratbagd.connect("device-removed", lambda r, d: removed.append(d))
+
+        description = {"name": "Hotplugged", "profiles": [{"buttons": [{}] * 3}]}
+        self.ratbagd._dbus_call("LoadTestDevice", "s", json.dumps(description))
+        self.assertTrue(spin(lambda: added))
+        device = added[0]
+        self.assertEqual(device.name, "Hotplugged")
+        self.assertIs(self.ratbagd[device.id], device)
+        self.assertEqual(len(device.active_profile.buttons), 3)
+
+        self.ratbagd._dbus_call("RemoveTestDevice", "o", device._object_path)
+        self.assertTrue(spin(lambda: removed))
+        self.assertIs(removed[0], device)
+        self.assertEqual(self.ratbagd.devices, [self.device])
+        self.assertIsNone(self.ratbagd[device.id])
+
+    def test_vanished_device(self):
+        added = []
+        self.ratbagd.connect("device-added", lambda r, d: added.append(d))
+
+        description = {"name": "Hotplugged", "profiles": [{}]}
+        self.ratbagd._dbus_call("LoadTestDevice", "s", json.dumps(description))
+        # The cached Devices property is only updated by the main loop.
+        devices = self.ratbagd._proxy.call_sync(
+            "org.freedesktop.DBus.Properties.Get",
+            GLib.Variant("(ss)", (self.ratbagd._interface, "Devices")),
+            Gio.DBusCallFlags.NONE,
+            2000,
+            None,
+        ).unpack()[0]
+        # As if a device was unplugged again before we got to load it.
+        vanished = f"{devices[-1]}_vanished"
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            self.ratbagd._on_properties_changed(
+                self.ratbagd._proxy,
+                GLib.Variant(
+                    "a{sv}", {"Devices": GLib.Variant("ao", [*devices, vanished])}
+                ),
+                [],
+            )
+        self.assertIn(f"Cannot load device {vanished}", stderr.getvalue())
+        self.assertEqual([d.name for d in added], ["Hotplugged"])
+        self.assertEqual(self.ratbagd.devices, [self.device, added[0]])
+
+        self.ratbagd._dbus_call("RemoveTestDevice", "o", added[0]._object_path)
+        self.assertTrue(spin(lambda: len(self.ratbagd.devices) == 1))
+
+    def test_removed_releases_proxies(self):
+        added = []
+        self.ratbagd.connect("device-added", lambda r, d: added.append(d))
+        description = {"name": "Hotplugged", "profiles": [{"buttons": [{}]}]}
+        self.ratbagd._dbus_call("LoadTestDevice", "s", json.dumps(description))
+        self.assertTrue(spin(lambda: added))
+        device = added[0]
+        profile = device.profiles[0]
+        button = profile.buttons[0]
+        prefetched = ratbagd.RatbagdDevice._prefetched_proxies
+        self.assertIs(
+            prefetched[(profile._interface, profile._object_path)], profile._proxy
+        )
+
+        self.ratbagd._dbus_call("RemoveTestDevice", "o", device._object_path)
+        self.assertTrue(spin(lambda: device not in self.ratbagd.devices))
+        for obj in (device, profile, button):
+            self.assertNotIn((obj._interface, obj._object_path), prefetched)
+
+        # As if a new device took over the path.
+        notified = []
+        profile.connect("notify::report-rate", lambda p, pspec: notified.append(p))
+        ratbagd.RatbagdDevice._on_prefetched_properties_changed(
+            None,
+            None,
+            profile._object_path,
+            "org.freedesktop.DBus.Properties",
+            "PropertiesChanged",
+            GLib.Variant(
+                "(sa{sv}as)",
+                (profile._interface, {"ReportRate": GLib.Variant("u", 125)}, []),
+            ),
+        )
+        self.assertEqual(notified, [])
+        self.assertEqual(profile.report_rate, 1000)
+
+    def test_removed_while_loading(self):
+        added = []
+        self.ratbagd.connect("device-added", lambda r, d: added.append(d))
+        description = {"name": "Hotplugged", "profiles": [{"buttons": [{}]}] * 3}
+        self.ratbagd._dbus_call("LoadTestDevice", "s", json.dumps(description))
+        self.assertTrue(spin(lambda: added))
+        device = added[0]
+
+        errors = []
+        with mock.patch.object(sys, "excepthook", lambda *args: errors.append(args[1])):
+            device.load_profiles_in_idle()
+            self.ratbagd._dbus_call("RemoveTestDevice", "o", device._object_path)
+            self.assertTrue(spin(lambda: device not in self.ratbagd.devices))
+            spin(timeout=0.1)
+        self.assertEqual(errors, [])
+        self.assertEqual(device._idle_load_id, 0)
+        self.assertFalse(device.profiles[2].is_loaded)
+
+        # The idle callback may also run before the removal is processed.
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            self.assertEqual(device._on_idle_load_profile(), GLib.SOURCE_REMOVE)
+            # And the widgets may still read the profiles.
+            self.assertEqual(device.profiles[2].buttons, [])
+        self.assertIn(
+            f"Cannot load profile {device.profiles[2]._object_path}", stderr.getvalue()
+        )
+
+
+class TestFailures(RatbagdTestCase):
+    mock_args = (
+        "--fail",
+        "Resolution",
+        "--fail",
+        "Commit:0",
+        "--fail",
+        "SetDefault:-1001",
+    )
+
+    def test_failed_write(self):
+        resolution = self.profile.resolutions[0]
+        errors = []
+        resolution._set_dbus_property_async(
+            "Resolution",
+            "v",
+            GLib.Variant("u", 1000),
+            callback=lambda result, error: errors.append(error),
+        )
+        self.assertEqual(resolution._get_dbus_property("Resolution"), 1000)
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertTrue(spin(lambda: errors))
+        self.assertIsInstance(errors[0], GLib.Error)
+        self.assertEqual(resolution._get_dbus_property("Resolution"), 800)
+
+    def test_failed_write_resyncs(self):
+        resolution = self.profile.resolutions[0]
+        ratbagd.set_write_behind_ms(0)
+        try:
+            resolution.resolution = (1000,)
+        finally:
+            ratbagd.set_write_behind_ms(50)
+        # Queued before ratbagd replied to the first write, both fail.
+        resolution.resolution = (1100,)
+        notified = []
+        resolution.connect(
+            "notify::resolution", lambda r, pspec: notified.append(r.resolution)
+        )
+        with contextlib.redirect_stderr(io.StringIO()) as stderr:
+            self.assertTrue(spin(lambda: notified))
+            spin(timeout=0.1)
+        self.assertEqual(notified, [(800,)])
+        self.assertEqual(resolution._get_dbus_property("Resolution"), 800)
+        self.assertEqual(ratbagd.RatbagdDevice._writes_in_flight, {})
+        self.assertIn("Failed to set Resolution", stderr.getvalue())
+
+    def test_failed_commit_resyncs(self):
+        resyncs = []
+        self.device.connect("resync", lambda device: resyncs.append(device))
+        self.device.commit()
+        self.assertTrue(spin(lambda: resyncs))
+
+    def test_error_code(self):
+        resolution = self.profile.resolutions[1]
+        with self.assertRaises(ratbagd.RatbagCapabilityError):
+            resolution._dbus_call("SetDefault", "")
+
+        errors = []
+        resolution.set_default(callback=lambda result, error: errors.append(error))
+        self.assertTrue(spin(lambda: errors))
+        self.assertIsInstance(errors[0], ratbagd.RatbagCapabilityError)
+        self.assertFalse(resolution.is_default)
+
+
+class TestDBusCallStats(RatbagdTestCase):
+    mock_args = ("--fail", "SetDefault:-1001", "--fail", "Resolution")
+
+    def setUp(self):
+        ratbagd.reset_dbus_call_stats()
+        super().setUp()
+
+    def get_stats(self, interface, member):
+        stats = ratbagd.get_dbus_call_stats()
+        return stats.get((f"org.freedesktop.ratbag_devel1.{interface}", member))
+
+    def test_prefetch(self):
+        stats = self.get_stats("Device", "GetAll")
+        self.assertEqual(stats.calls, 1)
+        self.assertEqual(self.get_stats("Profile", "GetAll").calls, 2)
+
+    def test_method(self):
+        self.device.commit()
+        self.assertTrue(spin(lambda: self.get_stats("Device", "Commit")))
+        stats = self.get_stats("Device", "Commit")
+        self.assertEqual(stats.calls, 1)
+        self.assertEqual(sum(stats.histogram), 1)
+        self.assertEqual(stats.errors, {})
+        self.assertEqual((stats.timeouts, stats.dbus_errors), (0, 0))
+        self.assertGreater(stats.max_ms, 0)
+        self.assertLessEqual(stats.percentile_ms(50), stats.BUCKETS_MS[-1])
+
+    def test_error_code(self):
+        errors = []
+        self.profile.resolutions[1].set_default(
+            callback=lambda result, error: errors.append(error)
+        )
+        self.assertTrue(spin(lambda: errors))
+        stats = self.get_stats("Resolution", "SetDefault")
+        self.assertEqual(stats.errors, {ratbagd.RatbagErrorCode.CAPABILITY: 1})
+
+    def test_failed_write(self):
+        resolution = self.profile.resolutions[0]
+        with self.assertRaises(GLib.Error), contextlib.redirect_stderr(io.StringIO()):
+            resolution._set_dbus_property("Resolution", "v", GLib.Variant("u", 1000))
+        stats = self.get_stats("Resolution", "Resolution")
+        self.assertEqual((stats.calls, stats.dbus_errors), (1, 1))
+
+    def test_async_write(self):
+        resolution = self.profile.resolutions[-1]
+        done = []
+        with mock.patch.object(ratbagd._RatbagdDBus, "write_behind_ms", 0):
+            resolution._set_dbus_property_async(
+                "IsDisabled",
+                "b",
+                True,
+                callback=lambda result, error: done.append(error),
+            )
+        # Sent right away rather than from a timeout: ratbagd has the value
+        # before the main loop ran.
+        self.assertEqual(ratbagd._RatbagdDBus._pending_writes, {})
+        value = resolution._proxy.call_sync(
+            "org.freedesktop.DBus.Properties.Get",
+            GLib.Variant("(ss)", (resolution._interface, "IsDisabled")),
+            Gio.DBusCallFlags.NONE,
+            2000,
+            None,
+        )
+        self.assertEqual(value.unpack(), (True,))
+        self.assertEqual(done, [])
+        self.assertTrue(spin(lambda: done))
+        self.assertEqual(self.get_stats("Resolution", "IsDisabled").calls, 1)
+        resolution.set_disabled(False)
+
+    def test_dump(self):
+        self.device.commit()
+        self.assertTrue(spin(lambda: self.get_stats("Device", "Commit")))
+        out = io.StringIO()
+        ratbagd.dump_dbus_call_stats(out)
+        self.assertIn(
+            "org.freedesktop.ratbag_devel1.Device.Commit: 1 calls", out.getvalue()
+        )
+
+
+class TestTrace(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.mock = MockRatbagd()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.mock.stop()
+
+    def setUp(self):
+        # Tracing may be enabled through PIPER_TRACE.
+        trace.stop()
+
+    def tearDown(self):
+        trace.stop()
+
+    def test_startup_spans(self):
+        trace.start()
+        with ratbagd.Ratbagd(2):
+            events = trace.get_events()
+        names = [e["name"] for e in events]
+        self.assertIn("Ratbagd.__init__", names)
+        self.assertIn("RatbagdDevice.__init__", names)
+        self.assertIn("_RatbagdDBus._prefetch_proxies", names)
+        for event in events:
+            self.assertEqual(event["ph"], "X")
+            self.assertGreaterEqual(event["dur"], 0)
+        # The device is built within Ratbagd.__init__.
+        outer = events[names.index("Ratbagd.__init__")]
+        inner = events[names.index("RatbagdDevice.__init__")]
+        self.assertGreaterEqual(inner["ts"], outer["ts"])
+        self.assertLessEqual(inner["ts"] + inner["dur"], outer["ts"] + outer["dur"])
+
+    def test_write(self):
+        trace.start()
+        with trace.span("outer", answer=42):
+            trace.instant("mark")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "trace.json"
+            trace.write(str(path))
+            data = json.loads(path.read_text())
+        events = data["traceEvents"]
+        self.assertEqual([e["name"] for e in events], ["thread_name", "mark", "outer"])
+        self.assertEqual(events[2]["args"], {"answer": "42"})
+
+    def test_disabled(self):
+        with trace.span("ignored"):
+            pass
+        self.assertFalse(trace.is_enabled())
+        self.assertEqual(trace.get_events(), [])
+
+
+def setUpModule():
+    global bus
+    bus = PrivateBus()
+
+
+def tearDownModule():
+    bus.stop()
+
+
+def main():
+    global ratbagd, trace
+
+    parser = argparse.ArgumentParser(description="ratbagd.py tests")
+    parser.add_argument("srcdir", nargs=1, help="Path to the piper sources")
+    args, remainder = parser.parse_known_args()
+
+    if shutil.which("dbus-daemon") is None:
+        print("dbus-daemon not found. Skipping")
+        sys.exit(77)
+
+    sys.path.insert(0, args.srcdir[0])
+    import piper.ratbagd
+    import piper.util.trace
+
+    ratbagd = piper.ratbagd
+    trace = piper.util.trace
+    unittest.main(argv=[sys.argv[0], *remainder])
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from pathlib import Path
 
 path = None
 svgdir = None
+svg_names = None
 config = None
 
 
@@ -26,6 +27,13 @@ class TestSVGLookup(unittest.TestCase):
         for svg in svgs:
             self.assertTrue(Path(svgdir, svg).exists(), msg=svg)
 
+    def test_svgs_listed(self):
+        # data/meson.build lists the SVGs to minify and bundle explicitly.
+        for svg in Path(svgdir).glob("*.svg"):
+            self.assertIn(
+                svg.stem, svg_names, msg=f"{svg.name} not in data/meson.build"
+            )
+
     def test_uniq_match(self):
         matches = [config[s]["DeviceMatch"] for s in config.sections()]
         d = {}
@@ -44,14 +52,18 @@ def setUpModule():
 
 
 def main():
-    global path, svgdir
+    global path, svgdir, svg_names
 
     parser = argparse.ArgumentParser(description="Device data-file checker")
     parser.add_argument("file", nargs=1, help="Absolute path to svg-lookup.ini")
     parser.add_argument("svgdir", nargs=1, help="Directory containing svg files")
+    parser.add_argument(
+        "--svgs", nargs="*", default=[], help="SVG names listed in data/meson.build"
+    )
     args, remainder = parser.parse_known_args()
     path = args.file[0]
     svgdir = args.svgdir[0]
+    svg_names = args.svgs
     unittest.main(argv=[sys.argv[0], *remainder])
 
 